@@ -0,0 +1,120 @@
+"""
+Aggregate the startups of past runs from the Parquet datasets written by export.py.
+
+Usage:
+    python aggregate.py [--by city|industry] [--since YYYY-MM-DD] [--until YYYY-MM-DD]
+                        [--trend D|W|M] [--top N] [--export-dir DIR]
+
+Prints how many distinct startups each city or industry has across the selected runs,
+and with --trend, how that count changed per day, week or month.
+"""
+import argparse
+import os
+from typing import List, TYPE_CHECKING
+import export
+
+# pandas and pyarrow are slow to import, so they are imported on first use
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Columns startups can be grouped by
+GROUP_COLUMNS = ("city", "industry")
+
+
+def load_dataset(dataset: str, columns: List[str] = None, since: str = None, until: str = None,
+                 export_dir: str = export.EXPORT_DIR) -> "pd.DataFrame":
+    """
+    Load the rows of a dataset as a DataFrame, reading only the given columns and only the
+    run_date partitions between since and until (YYYY-MM-DD, inclusive).
+    """
+    import pyarrow.dataset as ds
+
+    path = os.path.join(export_dir, dataset)
+    schema = export.get_schemas()[dataset]
+    if not os.path.isdir(path):
+        return schema.empty_table().select(columns or schema.names).to_pandas()
+
+    # Partition pruning: runs outside the date range are never opened
+    condition = None
+    if since:
+        condition = ds.field("run_date") >= since
+    if until:
+        upper = ds.field("run_date") <= until
+        condition = upper if condition is None else condition & upper
+
+    data = ds.dataset(path, schema=schema, format="parquet", partitioning=export.get_partitioning())
+    return data.to_table(columns=columns, filter=condition).to_pandas()
+
+
+def load_startups(since: str = None, until: str = None, export_dir: str = export.EXPORT_DIR) -> "pd.DataFrame":
+    """Load the startups of the selected runs, without the columns the aggregates don't need."""
+    columns = ["run_id", "run_date", "source_domain", "name_key", "city", "industry"]
+    return load_dataset(export.STARTUPS_DATASET, columns, since, until, export_dir)
+
+
+def with_group_values(startups: "pd.DataFrame", column: str) -> "pd.DataFrame":
+    """
+    Return the startups that have a value in `column`, with that value normalized into a
+    "value" column, so "prague", "Prague " and "PRAGUE" are counted together. Values are
+    compared casefolded and shown in their most common spelling, so "AI" and "SaaS" keep theirs.
+    """
+    if column not in GROUP_COLUMNS:
+        raise ValueError(f"Cannot group startups by '{column}'")
+
+    values = startups[column].str.strip()
+    startups = startups.assign(value=values)[values != ""]
+    keys = startups["value"].str.casefold()
+
+    # Most common spelling of each casefolded value, the alphabetically first on a tie
+    spellings = startups.groupby([keys.rename("key"), "value"], sort=False).size().reset_index(name="n")
+    labels = spellings.sort_values(["n", "value"], ascending=[False, True]).drop_duplicates("key")
+    return startups.assign(value=keys.map(labels.set_index("key")["value"]))
+
+
+def histogram(startups: "pd.DataFrame", column: str) -> "pd.Series":
+    """Count the distinct startups per city or industry, most common first."""
+    grouped = with_group_values(startups, column)
+    return grouped.groupby("value")["name_key"].nunique().sort_values(ascending=False)
+
+
+def trend(startups: "pd.DataFrame", column: str, freq: str = "W") -> "pd.DataFrame":
+    """
+    Count the distinct startups per city or industry in each period (D, W or M), as a
+    DataFrame with one row per period and one column per value.
+    """
+    import pandas as pd
+
+    grouped = with_group_values(startups, column)
+    periods = pd.to_datetime(grouped["run_date"]).dt.to_period(freq).dt.start_time
+    counts = grouped.assign(period=periods).groupby(["period", "value"])["name_key"].nunique()
+    return counts.unstack(fill_value=0).sort_index()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--by", choices=GROUP_COLUMNS, default="city", help="column to group startups by")
+    parser.add_argument("--since", help="first run date to include (YYYY-MM-DD)")
+    parser.add_argument("--until", help="last run date to include (YYYY-MM-DD)")
+    parser.add_argument("--trend", choices=("D", "W", "M"), help="also show counts per day, week or month")
+    parser.add_argument("--top", type=int, default=15, help="number of values to show")
+    parser.add_argument("--export-dir", default=export.EXPORT_DIR, help="directory of the exported datasets")
+    args = parser.parse_args()
+
+    startups = load_startups(args.since, args.until, args.export_dir)
+    if startups.empty:
+        print(f"No startups exported to {args.export_dir} for the selected dates.")
+        return
+
+    print(f"{startups['run_id'].nunique()} runs, {startups['name_key'].nunique()} distinct startups")
+    print(f"\nStartups by {args.by}:")
+    print(histogram(startups, args.by).head(args.top).to_string())
+
+    if args.trend:
+        counts = trend(startups, args.by, args.trend)
+        top_values = counts.sum().sort_values(ascending=False).index[:args.top]
+        print(f"\nStartups by {args.by} per period ({args.trend}):")
+        print(counts[top_values].to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Measure how long aggregating the exported run history takes.
+
+Usage:
+    python benchmarks/bench_aggregate.py [--runs N] [--startups N] [--export-dir DIR] [--repeat N]
+
+Writes --runs synthetic runs (spread over a year, --startups startups each, from a few
+sources) to a temporary export directory with export.write_run, unless --export-dir points
+at an existing export, then times loading the startups and computing the city and
+industry histograms and weekly trends.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aggregate
+import export
+
+CITIES = ["Prague", "Brno", "Ostrava", "Plzen", "Olomouc", "Liberec", "prague", "Hradec Kralove"]
+INDUSTRIES = ["Fintech", "SaaS", "E-commerce", "AI", "Healthtech", "Travel", "Cybersecurity", "Edtech"]
+SOURCES = ["https://www.startupblink.com/startups/czech-republic", "https://www.czechstartups.org/en/",
+           "https://www.crunchbase.com/hub/czech-republic-startups", "https://www.cc.cz/startupy/"]
+
+
+def write_synthetic_runs(export_dir, runs, startups_per_run):
+    """Write runs with random startups drawn from a fixed pool, one run every few hours."""
+    rng = random.Random(0)
+    pool = [(f"Startup {i}", rng.choice(CITIES), rng.choice(INDUSTRIES)) for i in range(startups_per_run * 5)]
+    start = time.time() - 365 * 24 * 60 * 60
+    for run in range(runs):
+        startups = [
+            {"name": name, "city": city, "industry": industry, "source_url": rng.choice(SOURCES)}
+            for name, city, industry in rng.sample(pool, startups_per_run)
+        ]
+        results = {"url": SOURCES[0], "structured_data": {"startups": startups}}
+        sources = [(url, f"Scraped text of {url} " * 200) for url in SOURCES]
+        export.write_run(results, sources, export_dir, run_at=start + run * 365 * 24 * 60 * 60 / runs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=1000, help="synthetic runs to write")
+    parser.add_argument("--startups", type=int, default=25, help="startups per synthetic run")
+    parser.add_argument("--export-dir", help="aggregate an existing export instead of synthetic runs")
+    parser.add_argument("--repeat", type=int, default=3, help="runs of the aggregation (best is reported)")
+    args = parser.parse_args()
+
+    export_dir = args.export_dir
+    if not export_dir:
+        export_dir = tempfile.mkdtemp(prefix="bench_aggregate_")
+        print(f"Writing {args.runs} synthetic runs to {export_dir}...")
+        start = time.perf_counter()
+        write_synthetic_runs(export_dir, args.runs, args.startups)
+        print(f"  {time.perf_counter() - start:.1f} s")
+
+    best = {}
+    for _ in range(args.repeat):
+        timings = {}
+        start = time.perf_counter()
+        startups = aggregate.load_startups(export_dir=export_dir)
+        timings["load"] = time.perf_counter() - start
+        for column in aggregate.GROUP_COLUMNS:
+            start = time.perf_counter()
+            aggregate.histogram(startups, column)
+            aggregate.trend(startups, column, "W")
+            timings[f"{column} histogram + trend"] = time.perf_counter() - start
+        best = {step: min(elapsed, best.get(step, elapsed)) for step, elapsed in timings.items()}
+
+    print(f"{len(startups)} startup rows from {startups['run_id'].nunique()} runs")
+    for step, elapsed in best.items():
+        print(f"{step:>26}: {elapsed * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
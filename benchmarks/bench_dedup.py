@@ -0,0 +1,94 @@
+"""
+Measure how many prompt tokens near-duplicate paragraph removal saves, and how long it takes.
+
+Usage:
+    python benchmarks/bench_dedup.py [FILE | DIR ...] [--threshold T] [--repeat N]
+
+With no paths, the cleaned text of every page stored in the HTTP cache
+(.cache/http_cache.sqlite) is used, in the order the pages were fetched; if the cache
+is empty, a synthetic corpus of sources syndicating the same paragraphs is generated.
+"""
+import argparse
+import glob
+import os
+import random
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cache
+import dedup
+import parsing
+import utils
+from main import count_tokens
+
+
+def load_texts(paths):
+    """Load (name, text) pairs from text files/directories, or the cleaned pages of the HTTP cache."""
+    texts = []
+    if paths:
+        for path in paths:
+            files = sorted(glob.glob(os.path.join(path, "*"))) if os.path.isdir(path) else [path]
+            for file_path in files:
+                with open(file_path, encoding="utf-8", errors="replace") as f:
+                    texts.append((os.path.basename(file_path), f.read()))
+    else:
+        db_path = cache.HTTPCache().path
+        if os.path.exists(db_path):
+            with sqlite3.connect(db_path) as conn:
+                for url, body in conn.execute("SELECT url, body FROM responses ORDER BY fetched_at"):
+                    content, _ = parsing.extract_content(body, url)
+                    if content:
+                        texts.append((url, utils.clean_text(content)))
+    return texts
+
+
+def synthetic_sources(count=8, paragraphs=200):
+    """Sources of unique paragraphs, a third of which also carry lightly edited copies of shared ones."""
+    rng = random.Random(0)
+    words = ["startup", "Prague", "Brno", "fintech", "founded", "investors", "team", "growth", "platform",
+             "seed", "accelerator", "funding", "CzechInvest", "round", "million", "deep", "tech", "AI"]
+    shared = [" ".join(rng.choices(words, k=45)) for _ in range(paragraphs // 3)]
+    sources = []
+    for i in range(count):
+        lines = [" ".join(rng.choices(words, k=45)) for _ in range(paragraphs)]
+        for paragraph in shared:
+            edited = paragraph.split()
+            edited[rng.randrange(len(edited))] = rng.choice(words)
+            lines.insert(rng.randrange(len(lines) + 1), " ".join(edited))
+        sources.append((f"synthetic-{i}", "\n".join(lines)))
+    return sources
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*", help="text files or directories of them, one per source")
+    parser.add_argument("--threshold", type=float, default=dedup.DEDUP_THRESHOLD, help="similarity threshold")
+    parser.add_argument("--repeat", type=int, default=3, help="runs (best time is reported)")
+    args = parser.parse_args()
+
+    texts = load_texts(args.paths)
+    if not texts:
+        print("No pages given or cached; using synthetic sources.")
+        texts = synthetic_sources()
+
+    total_tokens = sum(count_tokens(text) for _, text in texts)
+    best = float("inf")
+    for _ in range(args.repeat):
+        deduplicator = dedup.ParagraphDeduplicator(args.threshold, count_tokens=count_tokens)
+        start = time.perf_counter()
+        for _, text in texts:
+            deduplicator.dedupe(text)
+        best = min(best, time.perf_counter() - start)
+
+    stats = deduplicator.stats()
+    print(f"{len(texts)} source(s), {stats['paragraphs']} paragraphs, {total_tokens} tokens")
+    print(f"Dropped {stats['dropped']} paragraphs at threshold {args.threshold}: "
+          f"{stats['tokens_saved']} tokens saved ({stats['tokens_saved'] / max(total_tokens, 1):.1%})")
+    print(f"Deduplication took {best * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Measure how long it takes to import the app's modules, using `python -X importtime`.
+
+Usage:
+    python benchmarks/bench_import.py [MODULE ...] [--repeat N] [--max-ms MS] [--top N]
+
+Each module (main and utils by default) is imported in a fresh interpreter and the best
+cumulative import time over --repeat runs is reported, with the slowest imports it pulled in.
+Exits with status 1 if a module takes longer than --max-ms, or if importing it loads one of
+the heavy packages that should only be imported on first use (HEAVY_MODULES), so it can be
+used to catch import-time regressions.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Packages that must not be imported when the app starts
+HEAVY_MODULES = ("langchain", "langchain_core", "langchain_openai", "openai", "serpapi",
+                 "fake_useragent", "tiktoken", "bs4", "pydantic", "pyarrow", "pandas")
+
+# Lines look like "import time:       974 |     132415 | main", times in microseconds
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def import_times(module):
+    """
+    Import a module in a fresh interpreter and return [(name, self_us, cumulative_us)]
+    for the module and everything it imported, the module itself last.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        sys.exit(f"Importing {module} failed:\n{completed.stderr[-2000:]}")
+
+    entries = []
+    for line in completed.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append((name, int(self_us), int(cumulative_us), len(indent)))
+
+    # Nested imports are listed before their parent and indented deeper, so the module's
+    # subtree is the run of indented lines just before its own top-level line
+    end = max(i for i, (name, _, _, indent) in enumerate(entries) if name == module and indent == 1)
+    start = end
+    while start > 0 and entries[start - 1][3] > 1:
+        start -= 1
+    return [(name, self_us, cumulative_us) for name, self_us, cumulative_us, _ in entries[start:end + 1]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("modules", nargs="*", default=["main", "utils"], help="modules to import")
+    parser.add_argument("--repeat", type=int, default=5, help="imports per module (best is reported)")
+    parser.add_argument("--max-ms", type=float, default=None, help="fail if a module takes longer than this")
+    parser.add_argument("--top", type=int, default=10, help="number of slowest imports to list")
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.modules:
+        runs = [import_times(module) for _ in range(args.repeat)]
+        best = min(runs, key=lambda entries: entries[-1][2])
+        total_ms = best[-1][2] / 1000
+
+        print(f"{module}: {total_ms:.1f} ms")
+        for name, _, cumulative_us in sorted(best[:-1], key=lambda e: e[2], reverse=True)[:args.top]:
+            print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+        heavy = sorted({name.split(".")[0] for name, _, _ in best if name.split(".")[0] in HEAVY_MODULES})
+        if heavy:
+            print(f"  imports heavy modules at startup: {', '.join(heavy)}")
+            failed = True
+        if args.max_ms is not None and total_ms > args.max_ms:
+            print(f"  slower than the {args.max_ms:.0f} ms budget")
+            failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
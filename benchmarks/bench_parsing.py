@@ -0,0 +1,119 @@
+"""
+Compare the HTML parser backends on saved pages.
+
+Usage:
+    python benchmarks/bench_parsing.py [PAGE.html | DIR ...] [--repeat N]
+
+With no paths, every page stored in the HTTP cache (.cache/http_cache.sqlite) is used;
+if the cache is empty, synthetic pages with navigation, cookie banners, link lists and
+footers around their main content are generated.
+
+Each backend runs extract_content_and_links, the extraction the scraper uses.
+"""
+import argparse
+import glob
+import os
+import random
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cache
+import parsing
+
+
+def load_pages(paths):
+    """Load (name, html) pairs from files/directories, or from the HTTP cache if no paths are given."""
+    pages = []
+    if paths:
+        for path in paths:
+            files = sorted(glob.glob(os.path.join(path, "*.html"))) if os.path.isdir(path) else [path]
+            for file_path in files:
+                with open(file_path, encoding="utf-8", errors="replace") as f:
+                    pages.append((os.path.basename(file_path), f.read()))
+    else:
+        db_path = cache.HTTPCache().path
+        if os.path.exists(db_path):
+            with sqlite3.connect(db_path) as conn:
+                pages = conn.execute("SELECT url, body FROM responses").fetchall()
+    return pages
+
+
+def synthetic_pages(count=20, paragraphs=150):
+    """Startup directory-like pages: boilerplate and link lists around an article of paragraphs and links."""
+    rng = random.Random(0)
+    words = ["startup", "Prague", "Brno", "fintech", "founded", "investors", "team", "growth", "platform",
+             "seed", "accelerator", "funding", "CzechInvest", "round", "million", "deep", "tech", "AI"]
+    pages = []
+    for i in range(count):
+        nav = "".join(f'<li><a href="/section/{j}">{rng.choice(words)}</a></li>' for j in range(40))
+        related = "".join(f'<a href="/startup/{j}">{rng.choice(words)} {j}</a> ' for j in range(60))
+        article = "".join(
+            f'<p>{" ".join(rng.choices(words, k=40))} <a href="https://startup{i}-{j}.cz">startup {j}</a> '
+            f'<a href="mailto:info@startup{i}-{j}.cz">contact</a></p>'
+            for j in range(paragraphs)
+        )
+        html = (
+            f'<html><head><title>Page {i}</title><script>var x = {i};</script><style>p {{}}</style></head><body>'
+            f'<div class="cookie-banner">We use cookies <button>Accept</button></div>'
+            f'<header><nav><ul>{nav}</ul></nav></header>'
+            f'<main><article><h1>Czech startups {i}</h1>{article}</article>'
+            f'<div class="sidebar-widget">{related}</div><div>{related}</div></main>'
+            f'<footer><p>Copyright</p>{related}</footer></body></html>'
+        )
+        pages.append((f"https://synthetic-{i}.example/startups", html))
+    return pages
+
+
+def extract(html, url, backend):
+    """Run the scraper's extraction of a page with one backend."""
+    return parsing.extract_content_and_links(html, url, backend=backend)
+
+
+def time_backend(backend, pages, repeat):
+    """Return the best total time over `repeat` runs of extract_content_and_links across all pages."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for name, html in pages:
+            extract(html, name, backend)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*", help="HTML files or directories of .html files")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per backend (best is reported)")
+    args = parser.parse_args()
+
+    pages = load_pages(args.paths)
+    if not pages:
+        print("No pages given or cached; using synthetic pages.")
+        pages = synthetic_pages()
+
+    total_mb = sum(len(html.encode("utf-8")) for _, html in pages) / 1e6
+    print(f"{len(pages)} pages, {total_mb:.2f} MB")
+
+    baseline = time_backend(parsing.BeautifulSoupParser.name, pages, args.repeat)
+    print(f"{'html.parser':>12}: {baseline * 1000:8.1f} ms  ({total_mb / baseline:6.2f} MB/s)")
+
+    if parsing.get_parser(parsing.LxmlParser.name).name != parsing.LxmlParser.name:
+        print("lxml is not installed; install it to compare backends.")
+        return
+
+    elapsed = time_backend(parsing.LxmlParser.name, pages, args.repeat)
+    print(f"{'lxml':>12}: {elapsed * 1000:8.1f} ms  ({total_mb / elapsed:6.2f} MB/s)  {baseline / elapsed:.1f}x faster")
+
+    mismatches = [
+        name for name, html in pages
+        if extract(html, name, parsing.LxmlParser.name) != extract(html, name, parsing.BeautifulSoupParser.name)
+    ]
+    if mismatches:
+        print(f"Extracted text differs between backends for {len(mismatches)} page(s): {', '.join(mismatches[:5])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+import os
+import json
+import hashlib
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+# Directory holding all on-disk caches
+CACHE_DIR = os.getenv("STARTUP_CACHE_DIR", ".cache")
+
+# Pages younger than this are served from the cache without contacting the site
+HTTP_CACHE_TTL = float(os.getenv("HTTP_CACHE_TTL", 24 * 60 * 60))
+
+# LLM responses older than this are discarded, and only the most recently used
+# LLM_CACHE_MAX_ENTRIES responses are kept
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", 7 * 24 * 60 * 60))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 500))
+
+# Completed analyses younger than this are reused instead of recomputed, and only the
+# newest RESULT_MAX_VERSIONS analyses per configuration are kept
+RESULT_TTL = float(os.getenv("RESULT_TTL", 24 * 60 * 60))
+RESULT_MAX_VERSIONS = int(os.getenv("RESULT_MAX_VERSIONS", 20))
+
+
+class SQLiteCache:
+    """
+    Base class for caches stored in a SQLite file under CACHE_DIR.
+    Subclasses provide the file name and the CREATE statements for their tables.
+    """
+
+    filename = "cache.sqlite"
+    schema = ()
+
+    def __init__(self, path: str = None):
+        self.path = path or os.path.join(CACHE_DIR, self.filename)
+        self._initialized = False
+        self._init_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection, creating the database on first use."""
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                    with sqlite3.connect(self.path) as conn:
+                        for statement in self.schema:
+                            conn.execute(statement)
+                    self._initialized = True
+        # A connection per call keeps the cache safe to use from worker threads
+        return sqlite3.connect(self.path, timeout=30)
+
+
+class HTTPCache(SQLiteCache):
+    """
+    Persistent HTTP response cache stored in SQLite and keyed by URL.
+    Records the ETag and Last-Modified validators of each page so stale entries
+    can be revalidated with a conditional request instead of a full download.
+    """
+
+    filename = "http_cache.sqlite"
+    schema = ("""
+        CREATE TABLE IF NOT EXISTS responses (
+            url TEXT PRIMARY KEY,
+            body TEXT NOT NULL,
+            etag TEXT,
+            last_modified TEXT,
+            fetched_at REAL NOT NULL
+        )
+    """,)
+
+    def __init__(self, path: str = None, ttl: float = HTTP_CACHE_TTL):
+        super().__init__(path)
+        self.ttl = ttl
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """Return the cached entry for a URL, or None if it has never been stored."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT body, etag, last_modified, fetched_at FROM responses WHERE url = ?",
+                (url,)
+            ).fetchone()
+
+        if not row:
+            return None
+
+        return {
+            'url': url,
+            'body': row[0],
+            'etag': row[1],
+            'last_modified': row[2],
+            'fetched_at': row[3]
+        }
+
+    def is_fresh(self, entry: Dict[str, Any]) -> bool:
+        """Return True if the entry is young enough to be served without revalidation."""
+        return time.time() - entry['fetched_at'] < self.ttl
+
+    def put(self, url: str, body: str, etag: str = None, last_modified: str = None):
+        """Store a freshly downloaded page together with its validators."""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (url, body, etag, last_modified, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                (url, body, etag, last_modified, time.time())
+            )
+
+    def touch(self, url: str):
+        """Mark an entry as fresh again after the server answered 304 Not Modified."""
+        with self._connect() as conn:
+            conn.execute("UPDATE responses SET fetched_at = ? WHERE url = ?", (time.time(), url))
+
+    @staticmethod
+    def conditional_headers(entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """Build If-None-Match / If-Modified-Since headers for revalidating an entry."""
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+
+class LLMCache(SQLiteCache):
+    """
+    Content-addressed cache of raw LLM responses.
+    Entries are keyed by a hash of everything that determines the response (model,
+    sampling settings and the full prompt), expire after `ttl` seconds and are evicted
+    least-recently-used beyond `max_entries`. Hits and misses are counted per process.
+    """
+
+    filename = "llm_cache.sqlite"
+    schema = ("""
+        CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY,
+            model TEXT,
+            response TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_used REAL NOT NULL
+        )
+    """, """
+        CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)
+    """)
+
+    def __init__(self, path: str = None, ttl: float = LLM_CACHE_TTL, max_entries: int = LLM_CACHE_MAX_ENTRIES):
+        super().__init__(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """Hash the inputs of an LLM call into a cache key."""
+        return hashlib.sha256(json.dumps(parts, default=str).encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for a key, or None on a miss."""
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT response FROM responses WHERE key = ? AND created_at > ?",
+                (key, now - self.ttl)
+            ).fetchone()
+            if row:
+                conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+
+        with self._stats_lock:
+            if row:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        return row[0] if row else None
+
+    def put(self, key: str, response: str, model: str = None):
+        """Store a response and evict expired or least recently used entries."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, created_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, model, response, now, now)
+            )
+            conn.execute("DELETE FROM responses WHERE created_at <= ?", (now - self.ttl,))
+            conn.execute(
+                "DELETE FROM responses WHERE key NOT IN (SELECT key FROM responses ORDER BY last_used DESC LIMIT ?)",
+                (self.max_entries,)
+            )
+
+    def stats(self) -> Dict[str, int]:
+        """Return the hit and miss counts for this process."""
+        with self._stats_lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+
+class SourceStore(SQLiteCache):
+    """
+    Last extraction of each scraped source: a fingerprint of its cleaned text, the text
+    itself and the LLM analyses produced from it. A source whose fingerprint hasn't changed
+    since the last run can reuse its stored analyses instead of being sent to the LLM again.
+    """
+
+    filename = "sources.sqlite"
+    schema = ("""
+        CREATE TABLE IF NOT EXISTS sources (
+            url TEXT PRIMARY KEY,
+            fingerprint TEXT NOT NULL,
+            content TEXT NOT NULL,
+            analysis_key TEXT,
+            analyses TEXT,
+            updated_at REAL NOT NULL
+        )
+    """,)
+
+    @staticmethod
+    def fingerprint(content: str) -> str:
+        """Hash the cleaned text of a source."""
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """Return the stored extraction for a URL, or None if it has never been stored."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT fingerprint, content, analysis_key, analyses, updated_at FROM sources WHERE url = ?",
+                (url,)
+            ).fetchone()
+
+        if not row:
+            return None
+
+        return {
+            'url': url,
+            'fingerprint': row[0],
+            'content': row[1],
+            'analysis_key': row[2],
+            'analyses': json.loads(row[3]) if row[3] else None,
+            'updated_at': row[4]
+        }
+
+    def get_analyses(self, url: str, content: str, analysis_key: str) -> Optional[List[str]]:
+        """
+        Return the stored analyses for a source if its content is unchanged and they were
+        produced with the same model and prompt (`analysis_key`), otherwise None.
+        """
+        entry = self.get(url)
+        if (entry and entry['fingerprint'] == self.fingerprint(content)
+                and entry['analysis_key'] == analysis_key):
+            return entry['analyses']
+        return None
+
+    def put(self, url: str, content: str, analysis_key: str = None, analyses: List[str] = None):
+        """Store the latest extraction of a source and the analyses produced from it."""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sources (url, fingerprint, content, analysis_key, analyses, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (url, self.fingerprint(content), content, analysis_key,
+                 json.dumps(analyses) if analyses is not None else None, time.time())
+            )
+
+
+class ResultStore(SQLiteCache):
+    """
+    Versioned store of completed analyses, shared by every session and kept across restarts.
+    Each analysis is saved as a new version under a key describing the configuration that
+    produced it; the latest version per key is also kept in memory.
+    """
+
+    filename = "results.sqlite"
+    schema = ("""
+        CREATE TABLE IF NOT EXISTS results (
+            version INTEGER PRIMARY KEY AUTOINCREMENT,
+            config_key TEXT NOT NULL,
+            analysis_date TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            results TEXT NOT NULL
+        )
+    """, """
+        CREATE INDEX IF NOT EXISTS results_config_key ON results (config_key, version)
+    """)
+
+    def __init__(self, path: str = None, ttl: float = RESULT_TTL, max_versions: int = RESULT_MAX_VERSIONS):
+        super().__init__(path)
+        self.ttl = ttl
+        self.max_versions = max_versions
+        self._latest: Dict[str, Dict[str, Any]] = {}
+        self._latest_lock = threading.Lock()
+
+    def latest(self, config_key: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the newest analysis for a configuration as a dictionary with 'version',
+        'analysis_date', 'created_at' and 'results', or None if there is none.
+        """
+        with self._latest_lock:
+            entry = self._latest.get(config_key)
+        if entry:
+            return entry
+
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT version, analysis_date, created_at, results FROM results "
+                "WHERE config_key = ? ORDER BY version DESC LIMIT 1",
+                (config_key,)
+            ).fetchone()
+
+        if not row:
+            return None
+
+        entry = {
+            'version': row[0],
+            'analysis_date': row[1],
+            'created_at': row[2],
+            'results': json.loads(row[3])
+        }
+        with self._latest_lock:
+            self._latest[config_key] = entry
+        return entry
+
+    def is_fresh(self, entry: Dict[str, Any]) -> bool:
+        """Return True if the analysis is younger than the TTL and doesn't need recomputing."""
+        return time.time() - entry['created_at'] < self.ttl
+
+    def put(self, config_key: str, results: Dict[str, Any]) -> int:
+        """Save a completed analysis as the newest version and return its version number."""
+        now = time.time()
+        analysis_date = time.strftime("%Y-%m-%d", time.localtime(now))
+        with self._connect() as conn:
+            version = conn.execute(
+                "INSERT INTO results (config_key, analysis_date, created_at, results) VALUES (?, ?, ?, ?)",
+                (config_key, analysis_date, now, json.dumps(results))
+            ).lastrowid
+            conn.execute(
+                "DELETE FROM results WHERE config_key = ? AND version NOT IN "
+                "(SELECT version FROM results WHERE config_key = ? ORDER BY version DESC LIMIT ?)",
+                (config_key, config_key, self.max_versions)
+            )
+
+        with self._latest_lock:
+            self._latest[config_key] = {
+                'version': version,
+                'analysis_date': analysis_date,
+                'created_at': now,
+                'results': results
+            }
+        return version
@@ -0,0 +1,104 @@
+import os
+import hashlib
+import heapq
+import re
+import threading
+from typing import Dict, List, Callable, Optional
+
+# Paragraphs whose word shingles overlap at least this much (Jaccard similarity) with a
+# paragraph seen earlier are dropped as near-duplicates
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", 0.7))
+
+# Words per shingle
+SHINGLE_SIZE = 3
+
+# Paragraphs shorter than this many words (headings, list entries, company names) are
+# always kept: they carry facts of their own and are too short to compare reliably
+MIN_PARAGRAPH_WORDS = 12
+
+# Size of the bottom-k MinHash sketch of each paragraph: the hashes of its SKETCH_SIZE
+# smallest shingles. Paragraphs that share a sketch hash are candidates, which catches
+# pairs above 0.5 similarity almost surely; candidates are then checked exactly
+SKETCH_SIZE = 8
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+def shingles(paragraph: str) -> set:
+    """Return the hashed word shingles of a paragraph, ignoring case and punctuation."""
+    words = _WORD_PATTERN.findall(paragraph.lower())
+    grams = {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(max(1, len(words) - SHINGLE_SIZE + 1))}
+    return {int.from_bytes(hashlib.blake2b(gram.encode(), digest_size=8).digest(), "big") for gram in grams}
+
+
+def minhash(hashes: set) -> List[int]:
+    """Return the bottom-k MinHash sketch of a set of shingle hashes."""
+    return heapq.nsmallest(SKETCH_SIZE, hashes)
+
+
+def jaccard(a: set, b: set) -> float:
+    """Return the Jaccard similarity of two shingle sets."""
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+class ParagraphDeduplicator:
+    """
+    Drops paragraphs that nearly duplicate a paragraph seen earlier, in the same text or
+    in any text passed before, such as press releases syndicated by several sources.
+    Candidates are found through their MinHash sketches, so each paragraph is only compared
+    with the few that share a sketch hash with it, not with every earlier one.
+    """
+
+    def __init__(self, threshold: float = DEDUP_THRESHOLD, count_tokens: Callable[[str], int] = None):
+        self.threshold = threshold
+        self.count_tokens = count_tokens or (lambda text: len(text) // 4)
+        self._paragraphs: List[set] = []
+        self._buckets: Dict[int, List[int]] = {}
+        self._lock = threading.Lock()
+        self.paragraphs = 0
+        self.dropped = 0
+        self.tokens_saved = 0
+
+    def find_duplicate(self, hashes: set, sketch: List[int]) -> Optional[int]:
+        """Return the index of a seen paragraph at least `threshold` similar, or None."""
+        checked = set()
+        for value in sketch:
+            for index in self._buckets.get(value, []):
+                if index not in checked:
+                    checked.add(index)
+                    if jaccard(hashes, self._paragraphs[index]) >= self.threshold:
+                        return index
+        return None
+
+    def add(self, hashes: set, sketch: List[int]):
+        """Remember a kept paragraph so later near-duplicates of it are found."""
+        index = len(self._paragraphs)
+        self._paragraphs.append(hashes)
+        for value in sketch:
+            self._buckets.setdefault(value, []).append(index)
+
+    def dedupe(self, text: str) -> str:
+        """Return the text without the paragraphs (lines) that nearly duplicate earlier ones."""
+        kept = []
+        with self._lock:
+            for paragraph in text.split("\n"):
+                self.paragraphs += 1
+                if len(_WORD_PATTERN.findall(paragraph)) < MIN_PARAGRAPH_WORDS:
+                    kept.append(paragraph)
+                    continue
+
+                hashes = shingles(paragraph)
+                sketch = minhash(hashes)
+                if self.find_duplicate(hashes, sketch) is not None:
+                    self.dropped += 1
+                    self.tokens_saved += self.count_tokens(paragraph)
+                    continue
+
+                self.add(hashes, sketch)
+                kept.append(paragraph)
+        return "\n".join(kept)
+
+    def stats(self) -> Dict[str, int]:
+        """Return how many paragraphs were seen and dropped, and the tokens that saved."""
+        with self._lock:
+            return {'paragraphs': self.paragraphs, 'dropped': self.dropped, 'tokens_saved': self.tokens_saved}
@@ -0,0 +1,136 @@
+import os
+import time
+import uuid
+from typing import Dict, Any, List, Optional, Tuple, TYPE_CHECKING
+from urllib.parse import urlsplit
+import utils
+from cache import SourceStore
+
+# pyarrow is slow to import, so it is imported on first use
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+# Root directory of the Parquet datasets every run is appended to
+EXPORT_DIR = os.getenv("STARTUP_EXPORT_DIR", os.path.join("data", "runs"))
+
+# Set EXPORT_RUNS=0 to stop writing runs to the datasets
+EXPORT_RUNS = os.getenv("EXPORT_RUNS", "1") != "0"
+
+# Datasets under EXPORT_DIR: the cleaned content of each source, and the startups found in it
+SOURCES_DATASET = "sources"
+STARTUPS_DATASET = "startups"
+
+# Both datasets are partitioned as run_date=YYYY-MM-DD/source_domain=example.cz/
+PARTITION_COLUMNS = ["run_date", "source_domain"]
+
+
+def get_schemas() -> Dict[str, "pa.Schema"]:
+    """Return the Arrow schema of each dataset, partition columns included."""
+    import pyarrow as pa
+
+    run_fields = [
+        ("run_id", pa.string()),
+        ("run_at", pa.timestamp("s", tz="UTC")),
+        ("run_date", pa.string()),
+        ("source_domain", pa.string()),
+    ]
+    return {
+        SOURCES_DATASET: pa.schema(run_fields + [
+            ("url", pa.string()),
+            ("fingerprint", pa.string()),
+            ("chars", pa.int64()),
+            ("content", pa.string()),
+        ]),
+        STARTUPS_DATASET: pa.schema(run_fields + [
+            ("name", pa.string()),
+            ("name_key", pa.string()),
+            ("city", pa.string()),
+            ("industry", pa.string()),
+            ("website", pa.string()),
+            ("linkedin", pa.string()),
+            ("source_url", pa.string()),
+        ]),
+    }
+
+
+def get_partitioning():
+    """Return the hive partitioning of the datasets, with the partition values kept as strings."""
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    return ds.partitioning(pa.schema([(column, pa.string()) for column in PARTITION_COLUMNS]), flavor="hive")
+
+
+def source_domain(url: Optional[str]) -> str:
+    """Return the host of a source URL without "www.", "search" for search queries, or "unknown" without a URL."""
+    if not url:
+        return "unknown"
+    normalized = utils.normalize_url(url) if "://" in url else None
+    return urlsplit(normalized).hostname if normalized else "search"
+
+
+def build_run_rows(results: Dict[str, Any], sources: List[Tuple[Optional[str], str]],
+                   run_id: str, run_at: float) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Turn the results of one run into rows of each dataset. `sources` are the (url, text)
+    pairs of the combined scraped content; text without a source URL belongs to results["url"].
+    """
+    run = {
+        "run_id": run_id,
+        "run_at": int(run_at),
+        "run_date": time.strftime("%Y-%m-%d", time.gmtime(run_at)),
+    }
+
+    source_rows = []
+    for url, text in sources:
+        url = url or results["url"]
+        source_rows.append(dict(run, source_domain=source_domain(url), url=url,
+                                fingerprint=SourceStore.fingerprint(text), chars=len(text), content=text))
+
+    startup_rows = []
+    for startup in results["structured_data"].get("startups", []):
+        # Startups are never attributed to results["url"]: it is the primary source or the search query
+        source_url = startup.get("source_url") or ""
+        startup_rows.append(dict(
+            run,
+            source_domain=source_domain(source_url),
+            name=startup["name"],
+            name_key=utils.company_name_key(startup["name"]),
+            city=startup.get("city", ""),
+            industry=startup.get("industry", ""),
+            website=startup.get("website", ""),
+            linkedin=startup.get("linkedin", ""),
+            source_url=source_url,
+        ))
+
+    return {SOURCES_DATASET: source_rows, STARTUPS_DATASET: startup_rows}
+
+
+def write_run(results: Dict[str, Any], sources: List[Tuple[Optional[str], str]],
+              export_dir: str = EXPORT_DIR, run_at: float = None) -> str:
+    """
+    Append one run's per-source content and startups to the Parquet datasets under
+    export_dir and return the run id. Every run writes its own files, named after the
+    run id, so runs can be written concurrently and never overwrite each other.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    run_id = uuid.uuid4().hex
+    schemas = get_schemas()
+    rows = build_run_rows(results, sources, run_id, run_at or time.time())
+
+    for dataset, dataset_rows in rows.items():
+        if not dataset_rows:
+            continue
+        table = pa.Table.from_pylist(dataset_rows, schema=schemas[dataset])
+        pq.write_to_dataset(
+            table,
+            root_path=os.path.join(export_dir, dataset),
+            partitioning=get_partitioning(),
+            basename_template=f"{run_id}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore"
+        )
+        print(f"Exported {len(dataset_rows)} {dataset} rows of run {run_id} to {os.path.join(export_dir, dataset)}")
+
+    return run_id
@@ -0,0 +1,137 @@
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, Optional
+
+# Analyses that can run at the same time across all sessions
+MAX_JOB_WORKERS = 2
+
+# Finished jobs are kept this long so every session polling them can pick up the result
+FINISHED_JOB_TTL = 60 * 60
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class Job:
+    """
+    State of one background job. The worker updates it through update(); pollers
+    read its status, progress message, partial result and final result or error.
+    """
+
+    def __init__(self, job_id: str, key: str):
+        self.id = job_id
+        self.key = key
+        self.status = PENDING
+        self.message = "Waiting for a free worker..."
+        self.partial = None
+        self.text = ""
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def update(self, message: str = None, partial: Any = None, text: str = None):
+        """Report progress: a status message, a partial result and/or the output so far."""
+        with self._lock:
+            if message is not None:
+                self.message = message
+            if partial is not None:
+                self.partial = partial
+            if text is not None:
+                self.text = text
+
+    @property
+    def done(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a consistent copy of the job's state."""
+        with self._lock:
+            return {
+                'id': self.id,
+                'key': self.key,
+                'status': self.status,
+                'message': self.message,
+                'partial': self.partial,
+                'text': self.text,
+                'result': self.result,
+                'error': self.error,
+                'created_at': self.created_at,
+                'finished_at': self.finished_at
+            }
+
+
+class JobManager:
+    """
+    Process-wide runner for background jobs on a worker pool.
+    Jobs are identified by a key describing the work; submitting a key that is already
+    queued or running returns the existing job instead of starting a duplicate.
+    """
+
+    def __init__(self, max_workers: int = MAX_JOB_WORKERS, finished_ttl: float = FINISHED_JOB_TTL):
+        self.finished_ttl = finished_ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs: Dict[str, Job] = {}
+        self._active: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key: str, fn: Callable, *args, **kwargs) -> str:
+        """
+        Run fn(job, *args, **kwargs) in the background and return the job id.
+        If a job with the same key is still in flight, its id is returned instead.
+        """
+        with self._lock:
+            self._prune()
+
+            job = self._active.get(key)
+            if job is not None:
+                print(f"Joining in-flight job {job.id} for '{key}'")
+                return job.id
+
+            job = Job(uuid.uuid4().hex, key)
+            self._jobs[job.id] = job
+            self._active[key] = job
+
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job.id
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Return a job by id, or None if it is unknown or has expired."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job: Job, fn: Callable, args, kwargs):
+        with job._lock:
+            job.status = RUNNING
+            job.message = "Starting..."
+
+        try:
+            result = fn(job, *args, **kwargs)
+            with job._lock:
+                job.result = result
+                job.status = DONE
+                job.message = "Done"
+        except Exception as e:
+            print(f"Job {job.id} for '{job.key}' failed: {e}")
+            with job._lock:
+                job.error = str(e)
+                job.status = FAILED
+                job.message = "Failed"
+        finally:
+            with job._lock:
+                job.finished_at = time.time()
+            with self._lock:
+                if self._active.get(job.key) is job:
+                    del self._active[job.key]
+
+    def _prune(self):
+        """Forget finished jobs older than finished_ttl. Call with the lock held."""
+        cutoff = time.time() - self.finished_ttl
+        expired = [job_id for job_id, job in self._jobs.items() if job.finished_at and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
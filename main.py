@@ -1,45 +1,148 @@
 import os
 import re
+import argparse
+import functools
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from bs4 import BeautifulSoup
-import requests
-from langchain.chains import LLMChain
-from langchain.prompts import PromptTemplate
-from langchain_openai import ChatOpenAI
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Tuple, Optional, Iterator, TYPE_CHECKING
 import utils
 import json
+import export
+import resolve
+import dedup
+import retrieval
+from cache import LLMCache, SourceStore
+from router import ModelRouter, is_downgradable_error
+from startup_store import StartupStore
 
-# Try different import methods for SerpAPI
-try:
-    from serpapi import google_search
-except ImportError:
+# langchain, the OpenAI client, pydantic, tiktoken and serpapi take over a second to import,
+# so they are imported where they are first used; these imports are for type hints only
+if TYPE_CHECKING:
+    from langchain.prompts import PromptTemplate
+    from langchain_openai import ChatOpenAI
+
+@functools.lru_cache(maxsize=None)
+def get_google_search():
+    """
+    Return the SerpAPI search function of whichever serpapi package is installed, or None.
+    """
+    # Try different import methods for SerpAPI
+    try:
+        from serpapi import google_search
+        return google_search
+    except ImportError:
+        pass
+    
     try:
         import serpapi
-        google_search = serpapi.search
+        return serpapi.search
     except (ImportError, AttributeError):
-        try:
-            from serpapi import GoogleSearch
-            def google_search(params):
-                search = GoogleSearch(params)
-                return search.get_dict()
-        except ImportError:
-            print("Warning: Neither serpapi nor google-search-results package is installed properly.")
-            google_search = None
+        pass
+    
+    try:
+        from serpapi import GoogleSearch
+        def google_search(params):
+            search = GoogleSearch(params)
+            return search.get_dict()
+        return google_search
+    except ImportError:
+        print("Warning: Neither serpapi nor google-search-results package is installed properly.")
+        return None
 
 # Load environment variables
 load_dotenv()
 
+# Search query used for the analysis
+SEARCH_QUERY = "how many startups in Czech Republic statistics data"
+
+# Token budgets for LLM calls
+MAX_CHUNK_TOKENS = 5000        # Content tokens per prompt; larger inputs are split and map-reduced
+MAX_CONCURRENT_LLM_CALLS = 4   # Chunks analyzed in parallel
+
+# Drop paragraphs that nearly duplicate ones from earlier sources before prompting
+# (see dedup.py); set DEDUP_PARAGRAPHS=0 to send every paragraph
+DEDUP_PARAGRAPHS = os.getenv("DEDUP_PARAGRAPHS", "1") != "0"
+
+# Raw LLM responses keyed by model, settings and prompt, so identical inputs cost nothing
+llm_cache = LLMCache()
+
+# Picks the model tier for each LLM call and records which tier served it
+llm_router = ModelRouter()
+
+# Last extraction and analyses of each source, so unchanged sources aren't re-analyzed
+source_store = SourceStore()
+
+# Individual startups found by the analyses, one record per company
+startup_store = StartupStore()
+
+# Section headers of the response, in the order the model writes them
+SECTION_HEADERS = [
+    "NUMBER OF STARTUPS:",
+    "TOP STARTUP CITIES:",
+    "KEY INDUSTRIES:",
+    "NOTABLE STARTUPS:",
+    "INSIGHTS AND NOTES:",
+]
+
+# Ask the model for a typed JSON object through function calling ("json", the default)
+# or for the free-text layout below ("text")
+USE_JSON_OUTPUT = os.getenv("LLM_OUTPUT_FORMAT", "json").lower() == "json"
+
+# Instruction replacing the text layout when the response comes back as a function call
+JSON_RESPONSE_FORMAT = """
+    Return your analysis by calling the StartupAnalysis function.
+"""
+
+# Expected layout of every text analysis, shared by the analysis and merge prompts
+TEXT_RESPONSE_FORMAT = """
+    Format your response as follows:
+    
+    NUMBER OF STARTUPS: [your estimate]
+    
+    TOP STARTUP CITIES:
+    - [City 1]: [brief description if available]
+    - [City 2]: [brief description if available]
+    ...
+    
+    KEY INDUSTRIES:
+    - [Industry 1]: [brief description if available]
+    - [Industry 2]: [brief description if available]
+    ...
+    
+    NOTABLE STARTUPS:
+    - [Name] | [City] | [Industry] | [Website if given] | [URL from the "--- DATA FROM" header above it]
+    ...
+    
+    INSIGHTS AND NOTES:
+    [Any additional insights or caveats about your analysis]
+"""
+
+RESPONSE_FORMAT = JSON_RESPONSE_FORMAT if USE_JSON_OUTPUT else TEXT_RESPONSE_FORMAT
+
+def serpapi_available() -> bool:
+    """
+    Return True if get_search_results can use SerpAPI rather than falling back to scraping.
+    """
+    return not utils.OFFLINE_MODE and bool(os.getenv("SERPAPI_API_KEY")) and get_google_search() is not None
+
 def get_search_results(query: str, num_results: int = 10) -> Tuple[str, str]:
     """
     Use SerpAPI to get search results about Czech startups.
     Returns the raw text content and the search query used.
     """
+    if utils.OFFLINE_MODE:
+        print("Offline mode: skipping SerpAPI and using cached pages.")
+        return scrape_startup_data()
+    
     api_key = os.getenv("SERPAPI_API_KEY")
     if not api_key:
         print("Warning: SERPAPI_API_KEY not set. Falling back to direct scraping.")
         return scrape_startup_data()
     
+    google_search = get_google_search()
     if google_search is None:
         print("Warning: SerpAPI functionality not available. Please install with: pip install google-search-results")
         return scrape_startup_data()
@@ -121,10 +224,12 @@ def scrape_startup_data() -> Tuple[str, str]:
     error_msg = "Failed to scrape data from any source. Consider using a different approach like SerpAPI or manual research."
     return error_msg, "N/A"
 
-def create_prompt() -> PromptTemplate:
+def create_prompt() -> "PromptTemplate":
     """
     Create a prompt template for the LLM.
     """
+    from langchain.prompts import PromptTemplate
+    
     template = """
     You are a data analysis expert focusing on the startup ecosystem in the Czech Republic.
     
@@ -137,40 +242,467 @@ def create_prompt() -> PromptTemplate:
     1. Estimate the number of startups in the Czech Republic (provide a specific number or range)
     2. Identify top 3-5 cities where startups are concentrated
     3. List the main industries or sectors where Czech startups are active
-    4. Extract all email addresses that appear in the data
-    5. Extract all company websites or LinkedIn URLs that appear in the data
+    4. List up to 25 individual startups named in the data, with their city, industry and website where given
+    {response_format}"""
     
-    Format your response as follows:
+    return PromptTemplate(
+        input_variables=["content", "url"],
+        template=template,
+        partial_variables={"response_format": RESPONSE_FORMAT}
+    )
+
+def create_reduce_prompt() -> "PromptTemplate":
+    """
+    Create a prompt template that merges partial analyses of a large input into one.
+    """
+    from langchain.prompts import PromptTemplate
     
-    NUMBER OF STARTUPS: [your estimate]
+    template = """
+    You are a data analysis expert focusing on the startup ecosystem in the Czech Republic.
     
-    TOP STARTUP CITIES:
-    - [City 1]: [brief description if available]
-    - [City 2]: [brief description if available]
-    ...
+    The data about Czech startups from {url} was too large to analyze at once, so it was split
+    into parts and each part was analyzed separately. Below are the partial analyses:
     
-    KEY INDUSTRIES:
-    - [Industry 1]: [brief description if available]
-    - [Industry 2]: [brief description if available]
-    ...
+    {content}
     
-    CONTACT INFORMATION:
-    - Emails: [list of unique email addresses]
-    - Websites: [list of unique website URLs]
-    - LinkedIn: [list of unique LinkedIn URLs]
+    Merge them into a single analysis:
     
-    INSIGHTS AND NOTES:
-    [Any additional insights or caveats about your analysis]
-    """
+    1. Combine the startup estimates into one number or range, preferring the best-sourced figures
+    2. Keep the top 3-5 cities across all parts
+    3. Merge the industry lists without duplicates
+    4. Keep the startups listed in the partial analyses, which have already been deduplicated, up to 25
+    {response_format}"""
     
     return PromptTemplate(
         input_variables=["content", "url"],
-        template=template
+        template=template,
+        partial_variables={"response_format": RESPONSE_FORMAT}
     )
 
+@functools.lru_cache(maxsize=None)
+def _get_encoding(model: str):
+    """Return the tiktoken encoding for a model, or None if it can't be loaded."""
+    # tiktoken gives exact token counts; without it we estimate from the text length
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        print(f"Warning: could not load tiktoken encoding ({e}). Estimating token counts.")
+        return None
+
+def count_tokens(text: str, model: str = "gpt-4") -> int:
+    """
+    Count the tokens in a text for the given model.
+    Falls back to an estimate of 4 characters per token if tiktoken isn't available.
+    """
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+def split_sources(content: str) -> List[Tuple[str, str]]:
+    """
+    Split the combined scraped text back into (url, text) pairs using the
+    "--- DATA FROM <url> ---" markers added by scrape_startup_data.
+    Text before the first marker (or text without markers) gets a url of None.
+    """
+    parts = re.split(r"^--- DATA FROM (.+?) ---$", content, flags=re.MULTILINE)
+    sources = []
+    if parts[0].strip():
+        sources.append((None, parts[0].strip()))
+    for i in range(1, len(parts) - 1, 2):
+        if parts[i + 1].strip():
+            sources.append((parts[i], parts[i + 1].strip()))
+    return sources
+
+def report_dedup(deduplicator: dedup.ParagraphDeduplicator):
+    """
+    Print how many near-duplicate paragraphs were dropped and the tokens that saved.
+    """
+    stats = deduplicator.stats()
+    if stats['dropped']:
+        print(f"Dropped {stats['dropped']} of {stats['paragraphs']} paragraphs as near-duplicates, "
+              f"saving about {stats['tokens_saved']} prompt tokens")
+
+def dedupe_content(content: str) -> str:
+    """
+    Drop paragraphs of the combined scraped text that nearly duplicate earlier ones,
+    keeping the first occurrence and the "--- DATA FROM <url> ---" markers.
+    """
+    if not DEDUP_PARAGRAPHS:
+        return content
+    
+    deduplicator = dedup.ParagraphDeduplicator(count_tokens=count_tokens)
+    parts = []
+    for url, text in split_sources(content):
+        text = deduplicator.dedupe(text)
+        parts.append(f"--- DATA FROM {url} ---\n\n{text}" if url else text)
+    report_dedup(deduplicator)
+    return "\n\n".join(parts)
+
+def retrieve_relevant_content(content: str) -> str:
+    """
+    Reduce content larger than the retrieval token budget to the passages most relevant to
+    the questions of the analysis prompt (see retrieval.py), so the prompt size is bounded
+    however much was scraped. Smaller content is returned unchanged.
+    """
+    if retrieval.RETRIEVAL_MODE == "off":
+        return content
+    
+    tokens = count_tokens(content)
+    if tokens <= retrieval.RETRIEVAL_TOKEN_BUDGET:
+        return content
+    
+    compact = retrieval.build_compact_content(split_sources(content), count_tokens)
+    print(f"Selected {count_tokens(compact)} of {tokens} tokens of relevant passages for the prompt")
+    return compact
+
+def pack_texts(texts: List[str], max_tokens: int) -> List[List[str]]:
+    """
+    Group consecutive texts so each group stays within max_tokens.
+    A text that is larger than the budget on its own gets a group to itself.
+    """
+    groups = []
+    current = []
+    current_tokens = 0
+    for text in texts:
+        tokens = count_tokens(text) + 1  # +1 for the separating newline
+        if current and current_tokens + tokens > max_tokens:
+            groups.append(current)
+            current = []
+            current_tokens = 0
+        current.append(text)
+        current_tokens += tokens
+    if current:
+        groups.append(current)
+    return groups
+
+def chunk_content(content: str, max_tokens: int = MAX_CHUNK_TOKENS) -> List[str]:
+    """
+    Split scraped content into chunks of at most max_tokens tokens.
+    Content that fits is returned as a single chunk. Otherwise every source gets its own
+    chunks, split on line (section) boundaries, and each chunk keeps its source marker.
+    """
+    if count_tokens(content) <= max_tokens:
+        return [content]
+    
+    chunks = []
+    for source_url, text in split_sources(content):
+        header = f"--- DATA FROM {source_url} ---\n\n" if source_url else ""
+        budget = max_tokens - count_tokens(header)
+        
+        # Break lines that are too long on their own into slices that fit
+        pieces = []
+        for line in text.split("\n"):
+            tokens = count_tokens(line)
+            if tokens <= budget:
+                pieces.append(line)
+            else:
+                step = max(1, len(line) * budget // tokens)
+                pieces.extend(line[i:i + step] for i in range(0, len(line), step))
+        
+        for group in pack_texts(pieces, budget):
+            chunks.append(header + "\n".join(group))
+    
+    return chunks
+
+def get_router() -> ModelRouter:
+    """
+    Return the model router that picks GPT-4 or GPT-3.5-turbo for each call.
+    """
+    return llm_router
+
+def bind_analysis_function(llm: "ChatOpenAI"):
+    """
+    Bind the StartupAnalysis schema to the model and force it to answer by calling it.
+    """
+    from schema import StartupAnalysis
+    
+    return llm.bind_tools([StartupAnalysis], tool_choice=StartupAnalysis.__name__)
+
+@functools.lru_cache(maxsize=None)
+def get_analysis_schema() -> Optional[str]:
+    """
+    Return the JSON schema of the StartupAnalysis function the model is asked to call, or None
+    for text output. It is part of every cache key, so changing the schema invalidates
+    the responses produced with the old one.
+    """
+    if not USE_JSON_OUTPUT:
+        return None
+    from schema import StartupAnalysis
+    
+    return json.dumps(StartupAnalysis.model_json_schema(), sort_keys=True)
+
+def is_cacheable_response(response: str) -> bool:
+    """
+    Return True if a response is worth caching: a valid StartupAnalysis with USE_JSON_OUTPUT,
+    or text with at least one of the SECTION_HEADERS. A model that answered without calling
+    the function, or refused, would otherwise be served from the cache on every later run.
+    """
+    if not response or not response.strip():
+        return False
+    if USE_JSON_OUTPUT:
+        try:
+            parse_json_analysis(response)
+        except ValueError:
+            return False
+        return True
+    return any(header in response for header in SECTION_HEADERS)
+
+def run_chain(router: ModelRouter, prompt: "PromptTemplate", content: str, url: str, task: str = "synthesize") -> str:
+    """
+    Run a single prompt through the LLM and return the raw response text.
+    With USE_JSON_OUTPUT the response is the JSON arguments of the StartupAnalysis call.
+    Responses are cached on disk, so an identical prompt for the same model is answered instantly.
+    
+    The router picks the model tier from the task and prompt size; if the call times out
+    or is rate limited, it is retried on the next cheaper tier.
+    """
+    formatted_prompt = prompt.format(content=content, url=url)
+    prompt_tokens = count_tokens(formatted_prompt)
+    
+    for tier, llm in router.candidates(task, prompt_tokens):
+        started = time.time()
+        key = llm_cache.make_key(llm.model_name, llm.temperature, llm.max_tokens, get_analysis_schema(), formatted_prompt)
+        cached_response = llm_cache.get(key)
+        if cached_response is not None:
+            print(f"Using cached {llm.model_name} response")
+            router.record(task, tier, prompt_tokens, started, "cached")
+            return cached_response
+        
+        try:
+            if USE_JSON_OUTPUT:
+                message = bind_analysis_function(llm).invoke(formatted_prompt)
+                response = json.dumps(message.tool_calls[0]['args']) if message.tool_calls else message.content
+            else:
+                from langchain.chains import LLMChain
+                chain = LLMChain(llm=llm, prompt=prompt)
+                response = chain.run(content=content, url=url)
+        except Exception as e:
+            if not is_downgradable_error(e) or tier is router.tiers[-1]:
+                router.record(task, tier, prompt_tokens, started, "error")
+                raise
+            print(f"{llm.model_name} timed out or was rate limited ({e}), downgrading")
+            router.record(task, tier, prompt_tokens, started, "downgraded")
+            continue
+        
+        router.record(task, tier, prompt_tokens, started, "ok")
+        if is_cacheable_response(response):
+            llm_cache.put(key, response, model=llm.model_name)
+        else:
+            print(f"Not caching the {llm.model_name} response: it is empty or not a valid analysis")
+        return response
+
+def stream_chain(router: ModelRouter, prompt: "PromptTemplate", content: str, url: str, task: str = "synthesize") -> Iterator[str]:
+    """
+    Run a single prompt through the LLM and yield the response text as it is generated.
+    Cached responses are yielded in one piece; new ones are cached once complete.
+    A tier that times out or is rate limited before producing any text is replaced by the next cheaper one.
+    """
+    formatted_prompt = prompt.format(content=content, url=url)
+    prompt_tokens = count_tokens(formatted_prompt)
+    
+    for tier, llm in router.candidates(task, prompt_tokens):
+        started = time.time()
+        key = llm_cache.make_key(llm.model_name, llm.temperature, llm.max_tokens, get_analysis_schema(), formatted_prompt)
+        cached_response = llm_cache.get(key)
+        if cached_response is not None:
+            print(f"Using cached {llm.model_name} response")
+            router.record(task, tier, prompt_tokens, started, "cached")
+            yield cached_response
+            return
+        
+        parts = []
+        try:
+            if USE_JSON_OUTPUT:
+                # The function call arguments arrive as fragments of the JSON text
+                for chunk in bind_analysis_function(llm).stream(formatted_prompt):
+                    for tool_call_chunk in chunk.tool_call_chunks:
+                        if tool_call_chunk.get('args'):
+                            parts.append(tool_call_chunk['args'])
+                            yield tool_call_chunk['args']
+            else:
+                for chunk in llm.stream(formatted_prompt):
+                    if chunk.content:
+                        parts.append(chunk.content)
+                        yield chunk.content
+        except Exception as e:
+            if parts or not is_downgradable_error(e) or tier is router.tiers[-1]:
+                router.record(task, tier, prompt_tokens, started, "error")
+                raise
+            print(f"{llm.model_name} timed out or was rate limited ({e}), downgrading")
+            router.record(task, tier, prompt_tokens, started, "downgraded")
+            continue
+        
+        router.record(task, tier, prompt_tokens, started, "ok")
+        response = "".join(parts)
+        if is_cacheable_response(response):
+            llm_cache.put(key, response, model=llm.model_name)
+        else:
+            print(f"Not caching the {llm.model_name} response: it is empty or not a valid analysis")
+        return
+
+def run_prompts_concurrently(router: ModelRouter, prompt: "PromptTemplate", contents: List[str], url: str,
+                             task: str = "extract", source_urls: List[Optional[str]] = None) -> List[str]:
+    """
+    Run the same prompt over several contents in parallel and return the responses in order.
+    Failed calls are skipped; if every call fails, the last error is raised.
+    If source_urls are given, the startups of each response are attributed to the source
+    its content came from (see stamp_source_url).
+    """
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_LLM_CALLS) as executor:
+        futures = [executor.submit(run_chain, router, prompt, content, url, task) for content in contents]
+    
+    responses = []
+    last_error = None
+    for i, future in enumerate(futures):
+        try:
+            response = future.result()
+            responses.append(stamp_source_url(response, source_urls[i]) if source_urls else response)
+        except Exception as e:
+            print(f"LLM call {i+1}/{len(futures)} failed: {e}")
+            last_error = e
+    
+    if not responses and last_error:
+        raise last_error
+    return responses
+
+def format_partial_analyses(analyses: List[str]) -> str:
+    """
+    Join partial analyses into the content of a merge prompt.
+    """
+    return "\n\n".join(f"--- PARTIAL ANALYSIS {i+1} ---\n{analysis}" for i, analysis in enumerate(analyses))
+
+def format_startups_section(startups: List[Dict[str, Any]]) -> str:
+    """
+    Format startups as the NOTABLE STARTUPS section of a text analysis.
+    """
+    lines = [" | ".join([startup["name"], startup.get("city", ""), startup.get("industry", ""),
+                         startup.get("website", ""), startup.get("source_url", "")])
+             for startup in startups]
+    return "NOTABLE STARTUPS:\n" + "".join(f"- {line}\n" for line in lines)
+
+def replace_startups(analysis: str, startups: List[Dict[str, Any]]) -> str:
+    """
+    Return a partial analysis with its startups replaced, in the same format (JSON or text).
+    """
+    if analysis.lstrip().startswith("{"):
+        data = json.loads(analysis)
+        data["startups"] = startups
+        return json.dumps(data, ensure_ascii=False)
+    
+    section = format_startups_section(startups) + "\n" if startups else ""
+    text, replaced = re.subn(r"NOTABLE STARTUPS:\s*.*?(?:\n\n|\Z)", lambda m: section, analysis, count=1, flags=re.DOTALL)
+    if not replaced and section:
+        text = analysis.replace("INSIGHTS AND NOTES:", section + "INSIGHTS AND NOTES:", 1)
+    return text
+
+def get_source_url(content: str) -> Optional[str]:
+    """
+    Return the URL of the source a chunk of scraped content came from, or None if it has
+    no "--- DATA FROM <url> ---" marker or spans several sources.
+    """
+    urls = {url for url, _ in split_sources(content) if url}
+    return urls.pop() if len(urls) == 1 else None
+
+def stamp_source_url(analysis: str, source_url: Optional[str]) -> str:
+    """
+    Return an analysis whose startups without a source_url are attributed to source_url,
+    the page the analyzed content came from.
+    """
+    if not source_url:
+        return analysis
+    startups = extract_structured_data(analysis).get("startups", [])
+    if all(startup.get("source_url") for startup in startups):
+        return analysis
+    
+    try:
+        return replace_startups(analysis, [dict(startup, source_url=startup.get("source_url") or source_url)
+                                           for startup in startups])
+    except ValueError as e:
+        print(f"Could not attribute the startups of an analysis to {source_url}: {e}")
+        return analysis
+
+def dedupe_partial_startups(analyses: List[str]) -> List[str]:
+    """
+    Resolve the startups of all partial analyses into one list of companies and keep it in
+    the first partial only, so a company listed by several sources or chunks is sent to the
+    merge prompt once instead of once per partial.
+    """
+    startups = []
+    for analysis in analyses:
+        startups.extend(extract_structured_data(analysis).get("startups", []))
+    if not startups:
+        return analyses
+    
+    resolved = resolve.resolve_startups(startups)
+    try:
+        return [replace_startups(analysis, resolved if i == 0 else []) for i, analysis in enumerate(analyses)]
+    except ValueError as e:
+        print(f"Could not deduplicate the startups of the partial analyses: {e}")
+        return analyses
+
+def merge_partial_analyses(router: ModelRouter, analyses: List[str], url: str) -> List[str]:
+    """
+    Merge partial analyses in groups until the remaining ones fit in a single merge prompt.
+    Their startups are deduplicated first (see dedupe_partial_startups).
+    """
+    prompt = create_reduce_prompt()
+    if len(analyses) > 1:
+        analyses = dedupe_partial_startups(analyses)
+    
+    while len(analyses) > 1:
+        groups = pack_texts(analyses, MAX_CHUNK_TOKENS)
+        if len(groups) == 1:
+            break
+        if len(groups) == len(analyses):
+            # Every partial fills the budget on its own; merge them pairwise
+            groups = [analyses[i:i + 2] for i in range(0, len(analyses), 2)]
+        
+        merged = [group[0] for group in groups if len(group) == 1]
+        to_merge = [format_partial_analyses(group) for group in groups if len(group) > 1]
+        print(f"Merging {len(analyses)} partial analyses in {len(to_merge)} step(s)...")
+        analyses = run_prompts_concurrently(router, prompt, to_merge, url, task="synthesize") + merged
+    
+    return analyses
+
+def reduce_analyses(router: ModelRouter, analyses: List[str], url: str) -> str:
+    """
+    Merge partial analyses into one response in the create_prompt format.
+    Partials that don't fit in a single merge prompt are merged in groups first.
+    """
+    analyses = merge_partial_analyses(router, analyses, url)
+    if len(analyses) == 1:
+        return analyses[0]
+    return run_chain(router, create_reduce_prompt(), format_partial_analyses(analyses), url, task="synthesize")
+
+def describe_llm_error(error: Exception) -> str:
+    """
+    Turn an exception from the OpenAI API into a user-friendly error message.
+    """
+    error_msg = str(error)
+    print(f"Error using OpenAI API: {error_msg}")
+    
+    if "API key" in error_msg or "Authentication" in error_msg:
+        return "Error: Invalid OpenAI API key. Please check your OPENAI_API_KEY environment variable."
+    elif "quota" in error_msg or "rate limit" in error_msg:
+        return "Error: OpenAI API rate limit exceeded or quota exhausted. Please try again later."
+    elif "model" in error_msg and "do not exist" in error_msg:
+        return "Error: The specified model is not available. Try using 'gpt-3.5-turbo' instead."
+    else:
+        return f"Error calling OpenAI API: {error_msg}"
+
 def process_with_llm(content: str, url: str) -> str:
     """
     Process the scraped content with an LLM using LangChain.
+    
+    Content larger than MAX_CHUNK_TOKENS is split into chunks that are analyzed
+    concurrently (map) and then merged into a single analysis (reduce).
     """
     # Check if API key is set
     api_key = os.getenv("OPENAI_API_KEY")
@@ -178,54 +710,250 @@ def process_with_llm(content: str, url: str) -> str:
         return "Error: OPENAI_API_KEY environment variable not set. Please set it in a .env file or export it in your shell."
     
     try:
-        # Try to initialize with GPT-4 first
-        try:
-            llm = ChatOpenAI(
-                model_name="gpt-4",  # Preferred model
-                temperature=0.2,
-                max_tokens=1500
-            )
-        except Exception as model_error:
-            print(f"Error using GPT-4: {str(model_error)}. Falling back to GPT-3.5-turbo.")
-            # Fall back to GPT-3.5-turbo if GPT-4 is not available
-            llm = ChatOpenAI(
-                model_name="gpt-3.5-turbo",  # Fallback model
-                temperature=0.2,
-                max_tokens=1500
-            )
+        router = get_router()
         
-        # Create the prompt template
-        prompt = create_prompt()
+        content = retrieve_relevant_content(dedupe_content(content))
+        chunks = chunk_content(content, MAX_CHUNK_TOKENS)
+        if len(chunks) == 1:
+            return run_chain(router, create_prompt(), content, url, task="synthesize")
         
-        # Create the chain
-        chain = LLMChain(llm=llm, prompt=prompt)
+        print(f"Content is too large for one prompt, analyzing it in {len(chunks)} chunks...")
+        partial_analyses = run_prompts_concurrently(router, create_prompt(), chunks, url, task="extract",
+                                                    source_urls=[get_source_url(chunk) for chunk in chunks])
+        return reduce_analyses(router, partial_analyses, url)
+    except Exception as e:
+        return describe_llm_error(e)
+
+def stream_with_llm(content: str, url: str) -> Iterator[str]:
+    """
+    Streaming version of process_with_llm that yields the response text as it arrives.
+    
+    For content larger than MAX_CHUNK_TOKENS the chunk analyses run first and only the
+    final merge is streamed. Errors before any text is yielded are yielded as a single
+    "Error: ..." message; errors after the response has started streaming are raised,
+    so the partial response can't be taken for a complete one.
+    """
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        yield "Error: OPENAI_API_KEY environment variable not set. Please set it in a .env file or export it in your shell."
+        return
+    
+    started = False
+    try:
+        router = get_router()
         
-        # Run the chain
-        response = chain.run(content=content, url=url)
+        content = retrieve_relevant_content(dedupe_content(content))
+        chunks = chunk_content(content, MAX_CHUNK_TOKENS)
+        if len(chunks) == 1:
+            prompt, prompt_content = create_prompt(), content
+        else:
+            print(f"Content is too large for one prompt, analyzing it in {len(chunks)} chunks...")
+            partial_analyses = run_prompts_concurrently(router, create_prompt(), chunks, url, task="extract",
+                                                        source_urls=[get_source_url(chunk) for chunk in chunks])
+            partial_analyses = merge_partial_analyses(router, partial_analyses, url)
+            if len(partial_analyses) == 1:
+                yield partial_analyses[0]
+                return
+            prompt, prompt_content = create_reduce_prompt(), format_partial_analyses(partial_analyses)
         
-        return response
+        for text in stream_chain(router, prompt, prompt_content, url, task="synthesize"):
+            started = True
+            yield text
+    except Exception as e:
+        message = describe_llm_error(e)
+        if started:
+            raise Exception(message) from e
+        yield message
+
+def get_analysis_key(router: ModelRouter) -> str:
+    """
+    Identify everything besides the content that determines a source's analyses: the model,
+    its settings, the prompt and function schema, the chunk size and how the content is
+    deduplicated and reduced before prompting. Stored analyses are only reused if it matches.
+    """
+    prompt = create_prompt()
+    return llm_cache.make_key(router.cache_identity(),
+                              prompt.template, RESPONSE_FORMAT, get_analysis_schema(), MAX_CHUNK_TOKENS,
+                              DEDUP_PARAGRAPHS, dedup.DEDUP_THRESHOLD,
+                              retrieval.RETRIEVAL_MODE, retrieval.RETRIEVAL_TOKEN_BUDGET, retrieval.RETRIEVAL_TOP_K)
+
+def analyze_source(router: ModelRouter, source: Dict[str, str]) -> List[str]:
+    """
+    Analyze a single scraped source, split into chunks if it is too large.
+    Returns the partial analyses for the source, with their startups attributed to it.
+    
+    If the source's cleaned content is unchanged since it was last analyzed, the stored
+    analyses are returned without calling the LLM. New analyses are only stored if every
+    chunk produced a usable one (see is_cacheable_response). The content analyzed is the source's
+    'prompt_content' if set, i.e. without paragraphs duplicated from other sources,
+    reduced to its most relevant passages if it is large.
+    
+    Stored analyses are keyed on the cleaned content before deduplication: which paragraphs
+    are dropped as duplicates depends on the order the sources arrived in, so the deduplicated
+    text would change between runs even when the source itself did not.
+    """
+    url = source['url']
+    analysis_key = get_analysis_key(router)
+    stored_analyses = source_store.get_analyses(url, source['content'], analysis_key)
+    if stored_analyses:
+        print(f"{url} is unchanged since the last run, reusing its analysis")
+        return stored_analyses
+    
+    print(f"{url} is new or has changed, analyzing it")
+    content = retrieve_relevant_content(source.get('prompt_content', source['content']))
+    chunks = chunk_content(content, MAX_CHUNK_TOKENS)
+    if len(chunks) == 1:
+        analyses = [stamp_source_url(run_chain(router, create_prompt(), content, url, task="extract"), url)]
+    else:
+        analyses = run_prompts_concurrently(router, create_prompt(), chunks, url, task="extract",
+                                            source_urls=[url] * len(chunks))
+    
+    # A failed chunk or an unusable response would otherwise be reused until the page changes
+    if len(analyses) == len(chunks) and all(is_cacheable_response(analysis) for analysis in analyses):
+        source_store.put(url, source['content'], analysis_key, analyses)
+    else:
+        print(f"Not storing the analysis of {url}: a chunk failed or returned no usable analysis")
+    return analyses
+
+def _produce_sources(source_queue: queue.Queue, scrape):
+    """
+    Put every source returned or yielded by `scrape` on the queue, followed by None.
+    """
+    try:
+        sources = scrape()
+        if isinstance(sources, dict):
+            sources = [sources]
+        for source in sources or []:
+            source_queue.put(source)
     except Exception as e:
-        error_msg = str(e)
-        print(f"Error using OpenAI API: {error_msg}")
+        print(f"Error scraping sources: {e}")
+    finally:
+        source_queue.put(None)
+
+def run_pipeline() -> Tuple[str, str, str]:
+    """
+    Scrape all sources and analyze each one with the LLM as soon as it arrives, while
+    slower sources are still downloading. The per-source analyses are then merged into one.
+    
+    Only sources whose content changed since the last run are sent to the LLM; the stored
+    analyses of the others are reused in the merge (see analyze_source).
+    
+    Returns the combined scraped text, the primary URL and the LLM response, the same
+    values scrape_startup_data and process_with_llm produce sequentially.
+    """
+    router = get_router() if os.getenv("OPENAI_API_KEY") else None
+    
+    # Producers: the StartupBlink special handler and the regular sources, each in its own thread
+    source_queue = queue.Queue()
+    producers = [
+        threading.Thread(target=_produce_sources, args=(source_queue, utils.scrape_startupblink_special), daemon=True),
+        threading.Thread(
+            target=_produce_sources,
+            # Like scrape_multiple_sources, keep the first MAX_SOURCES usable sources in source
+            # order; each is analyzed as soon as it is sure to be kept, and sorted back below
+            args=(source_queue, lambda: utils.iter_first_sources(utils.get_source_urls(), utils.MAX_SOURCES)),
+            daemon=True
+        ),
+    ]
+    for producer in producers:
+        producer.start()
+    
+    # Consumer: start the LLM analysis of each source as soon as it comes off the queue,
+    # without the paragraphs it shares with the sources that arrived before it
+    deduplicator = dedup.ParagraphDeduplicator(count_tokens=count_tokens)
+    sources = []
+    analyses = {}
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_LLM_CALLS) as executor:
+        finished = 0
+        while finished < len(producers):
+            source = source_queue.get()
+            if source is None:
+                finished += 1
+                continue
+            
+            print(f"Scraped {source['url']}")
+            sources.append(source)
+            if router:
+                if DEDUP_PARAGRAPHS:
+                    source['prompt_content'] = deduplicator.dedupe(source['content'])
+                analyses[source['url']] = executor.submit(analyze_source, router, source)
         
-        # Provide a more user-friendly error message
-        if "API key" in error_msg or "Authentication" in error_msg:
-            return "Error: Invalid OpenAI API key. Please check your OPENAI_API_KEY environment variable."
-        elif "quota" in error_msg or "rate limit" in error_msg:
-            return "Error: OpenAI API rate limit exceeded or quota exhausted. Please try again later."
-        elif "model" in error_msg and "do not exist" in error_msg:
-            return "Error: The specified model is not available. Try using 'gpt-3.5-turbo' instead."
-        else:
-            return f"Error calling OpenAI API: {error_msg}"
+        if not sources:
+            print("No useful content found from direct URL scraping. Using fallback search queries...")
+            fallback = utils.scrape_fallback_search()
+            if fallback:
+                sources.append(fallback)
+                if router:
+                    analyses[fallback['url']] = executor.submit(analyze_source, router, fallback)
+    
+    report_dedup(deduplicator)
+    
+    if not sources:
+        error_msg = "Failed to scrape data from any source. Consider using a different approach like SerpAPI or manual research."
+        return error_msg, "N/A", "Error: No data could be scraped to analyze."
+    
+    # Keep a stable source order (StartupBlink first, then CZECH_STARTUP_SOURCES order)
+    # so the combined text and the merge prompt don't depend on download timing
+    def source_rank(source):
+        url = source['url']
+        return utils.CZECH_STARTUP_SOURCES.index(url) if url in utils.CZECH_STARTUP_SOURCES else -1
+    sources.sort(key=source_rank)
+    
+    combined_text = ""
+    for source in sources:
+        combined_text += f"\n\n--- DATA FROM {source['url']} ---\n\n"
+        combined_text += source['content']
+    primary_url = sources[0]['url']
+    
+    if not router:
+        return combined_text, primary_url, "Error: OPENAI_API_KEY environment variable not set. Please set it in a .env file or export it in your shell."
+    
+    try:
+        partial_analyses = []
+        last_error = None
+        for source in sources:
+            try:
+                partial_analyses.extend(analyses[source['url']].result())
+            except Exception as e:
+                print(f"Analysis of {source['url']} failed: {e}")
+                last_error = e
+        if not partial_analyses:
+            raise last_error
+        
+        return combined_text, primary_url, reduce_analyses(router, partial_analyses, primary_url)
+    except Exception as e:
+        return combined_text, primary_url, describe_llm_error(e)
+
+def parse_json_analysis(llm_response: str) -> Dict[str, Any]:
+    """
+    Validate a JSON response against the StartupAnalysis schema in a single pass.
+    Raises pydantic's ValidationError (a ValueError) if it doesn't match.
+    """
+    from schema import StartupAnalysis
+    
+    analysis = StartupAnalysis.model_validate_json(llm_response)
+    result = analysis.model_dump()
+    result["number_of_startups"] = str(result["number_of_startups"])
+    # Contacts are extracted from the scraped pages, not by the LLM (see build_results)
+    result["contact_info"] = {"emails": [], "websites": [], "linkedin": []}
+    return result
 
 def extract_structured_data(llm_response: str) -> Dict[str, Any]:
     """
     Parse the LLM's response into structured data.
+    JSON responses are validated against the schema; free-text responses are parsed section by section.
     """
+    if llm_response.lstrip().startswith("{"):
+        try:
+            return parse_json_analysis(llm_response)
+        except ValueError as e:
+            print(f"LLM response is not a valid analysis, parsing it as text: {e}")
+    
     result = {
         "number_of_startups": "",
         "top_cities": [],
         "key_industries": [],
+        "startups": [],
         "contact_info": {
             "emails": [],
             "websites": [],
@@ -253,28 +981,19 @@ def extract_structured_data(llm_response: str) -> Dict[str, Any]:
         industry_items = re.findall(r"- (.*?)(?:\n|$)", industries_text)
         result["key_industries"] = [industry.strip() for industry in industry_items if industry.strip()]
     
-    # Extract contact information
-    contact_section = re.search(r"CONTACT INFORMATION:\s*(.*?)(?:\n\n|\Z)", llm_response, re.DOTALL)
-    if contact_section:
-        contact_text = contact_section.group(1).strip()
-        
-        # Extract emails
-        emails_match = re.search(r"Emails:\s*(.*?)(?:\n|$)", contact_text)
-        if emails_match:
-            emails_text = emails_match.group(1).strip()
-            result["contact_info"]["emails"] = [email.strip() for email in emails_text.split(',') if email.strip()]
-        
-        # Extract websites
-        websites_match = re.search(r"Websites:\s*(.*?)(?:\n|$)", contact_text)
-        if websites_match:
-            websites_text = websites_match.group(1).strip()
-            result["contact_info"]["websites"] = [website.strip() for website in websites_text.split(',') if website.strip()]
-        
-        # Extract LinkedIn URLs
-        linkedin_match = re.search(r"LinkedIn:\s*(.*?)(?:\n|$)", contact_text)
-        if linkedin_match:
-            linkedin_text = linkedin_match.group(1).strip()
-            result["contact_info"]["linkedin"] = [linkedin.strip() for linkedin in linkedin_text.split(',') if linkedin.strip()]
+    # Extract individual startups, one "Name | City | Industry | Website" line each
+    startups_section = re.search(r"NOTABLE STARTUPS:\s*(.*?)(?:\n\n|\Z)", llm_response, re.DOTALL)
+    if startups_section:
+        for line in re.findall(r"- (.*?)(?:\n|$)", startups_section.group(1).strip()):
+            fields = [field.strip().strip("[]") for field in line.split("|")] + ["", "", "", ""]
+            if fields[0]:
+                result["startups"].append({
+                    "name": fields[0],
+                    "city": fields[1],
+                    "industry": fields[2],
+                    "website": fields[3],
+                    "source_url": fields[4]
+                })
     
     # Extract insights
     insights_match = re.search(r"INSIGHTS AND NOTES:\s*(.*?)(?:\Z)", llm_response, re.DOTALL)
@@ -283,37 +1002,177 @@ def extract_structured_data(llm_response: str) -> Dict[str, Any]:
     
     return result
 
-def main():
+class IncrementalResponseParser:
     """
-    Main function to run the startup analysis.
+    Parses a streamed LLM response section by section.
+    A section counts as complete once the header of a later section has arrived, so
+    half-written lists never show up in the parsed data. For JSON responses a field
+    counts as complete once the next field has started.
     """
-    print("Getting data about Czech startups...")
-    # Use SerpAPI with a focused query
-    content, query = get_search_results("how many startups in Czech Republic statistics data")
     
-    print(f"Processing data from search query: {query}")
-    llm_response = process_with_llm(content, query)
+    def __init__(self):
+        self.text = ""
+        self._parsed_upto = 0
     
-    print("\n--- LLM Analysis ---")
-    print(llm_response)
+    def _feed_json(self) -> Dict[str, Any]:
+        """Parse the fields of a partial JSON response that are complete."""
+        from langchain_core.utils.json import parse_partial_json
+        from schema import StartupAnalysis
+        
+        partial = parse_partial_json(self.text)
+        if not isinstance(partial, dict):
+            return None
+        
+        # The last field may still be streaming
+        complete_fields = list(partial)[:-1]
+        if len(complete_fields) <= self._parsed_upto:
+            return None
+        
+        self._parsed_upto = len(complete_fields)
+        result = StartupAnalysis().model_dump()
+        for field in complete_fields:
+            if field in result:
+                result[field] = partial[field]
+        return parse_json_analysis(json.dumps(result))
+    
+    def feed(self, text: str) -> Dict[str, Any]:
+        """
+        Add newly streamed text. Returns the structured data for all completed sections
+        if this text completed a new one, otherwise None.
+        """
+        self.text += text
+        
+        if self.text.lstrip().startswith("{"):
+            try:
+                return self._feed_json()
+            except ValueError:
+                return None
+        
+        # Everything before the last header seen so far belongs to completed sections
+        complete_upto = max(self.text.rfind(header) for header in SECTION_HEADERS)
+        if complete_upto <= self._parsed_upto:
+            return None
+        
+        self._parsed_upto = complete_upto
+        return extract_structured_data(self.text[:complete_upto])
     
+    def finish(self) -> Dict[str, Any]:
+        """Parse the complete response once streaming has ended."""
+        self._parsed_upto = len(self.text)
+        return extract_structured_data(self.text)
+
+def build_results(content: str, url: str, llm_response: str) -> Dict[str, Any]:
+    """
+    Build the results dictionary from the scraped content and the LLM's response.
+    """
     # Extract structured data from LLM response
     structured_data = extract_structured_data(llm_response)
     
     # Create the results dictionary
     results = {
         "raw_content": content,
-        "url": query,
+        "url": url,
         "llm_response": llm_response,
         "structured_data": structured_data
     }
     
-    # Enrich the results with additional emails and URLs extracted directly from the raw content
-    enriched_results = utils.enrich_with_emails_and_urls(results)
+    # Contact information is extracted from the raw content and page links rather than by the LLM
+    results = utils.enrich_with_emails_and_urls(results)
+    
+    # Collapse startups named slightly differently into one record per company, then
+    # keep them in the local database
+    startups = resolve.resolve_startups(results["structured_data"].get("startups", []))
+    results["structured_data"]["startups"] = startups
+    if startups:
+        try:
+            saved = startup_store.upsert(startups)
+            print(f"Saved {saved} startup records to {startup_store.path}")
+        except Exception as e:
+            print(f"Error saving startup records: {e}")
+    
+    # Append this run's per-source content and startups to the Parquet datasets
+    if export.EXPORT_RUNS and url != "N/A":
+        try:
+            export.write_run(results, split_sources(content))
+        except Exception as e:
+            print(f"Error exporting run: {e}")
+    
+    return results
+
+def get_analysis_config() -> Dict[str, Any]:
+    """
+    Describe everything that determines the analysis besides the scraped data itself:
+    the query, the sources, the models and the prompt settings, including the schema of
+    the function the model is asked to call.
+    """
+    return {
+        "search_query": SEARCH_QUERY,
+        "sources": utils.CZECH_STARTUP_SOURCES,
+        "models": llm_router.cache_identity(),
+        "output_format": "json" if USE_JSON_OUTPUT else "text",
+        "schema": get_analysis_schema(),
+        "max_chunk_tokens": MAX_CHUNK_TOKENS,
+        "retrieval": [retrieval.RETRIEVAL_MODE, retrieval.RETRIEVAL_TOKEN_BUDGET, retrieval.RETRIEVAL_TOP_K],
+    }
+
+def get_analysis_config_key() -> str:
+    """Hash the analysis configuration into a key for stored results and jobs."""
+    return llm_cache.make_key(get_analysis_config())
+
+def run_analysis_job(job) -> Dict[str, Any]:
+    """
+    Run the full analysis as a background job (see jobs.JobManager), reporting progress on `job`:
+    a status message, the sections parsed so far and the response text so far.
+    Returns the results dictionary; raises if the LLM response breaks off partway through.
+    """
+    job.update(message="Scraping data...")
+    content, query = get_search_results(SEARCH_QUERY)
+    
+    job.update(message="Analyzing with LLM...")
+    parser = IncrementalResponseParser()
+    for text in stream_with_llm(content, query):
+        job.update(partial=parser.feed(text), text=parser.text)
     
-    return enriched_results
+    job.update(message="Extracting contact information...")
+    return build_results(content, query, parser.text)
+
+def main():
+    """
+    Main function to run the startup analysis.
+    """
+    print("Getting data about Czech startups...")
+    if serpapi_available():
+        # Use SerpAPI with a focused query
+        content, query = get_search_results(SEARCH_QUERY)
+        
+        print(f"Processing data from search query: {query}")
+        llm_response = process_with_llm(content, query)
+    else:
+        # Scrape the sources directly and analyze each one as soon as it arrives
+        print("SerpAPI not available. Scraping sources directly and analyzing them as they arrive.")
+        content, query, llm_response = run_pipeline()
+    
+    print("\n--- LLM Analysis ---")
+    print(llm_response)
+    
+    results = build_results(content, query, llm_response)
+    
+    cache_stats = llm_cache.stats()
+    print(f"LLM cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+    
+    tier_stats = llm_router.stats()
+    print("LLM calls by model tier: " + (", ".join(f"{tier}: {count}" for tier, count in tier_stats.items()) or "none"))
+    
+    return results
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analyze the Czech startup ecosystem.")
+    parser.add_argument("--offline", action="store_true", help="serve all pages from the on-disk cache")
+    args = parser.parse_args()
+    
+    if args.offline:
+        utils.set_offline_mode(True)
+    
     results = main()
     
     # Print key findings
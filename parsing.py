@@ -0,0 +1,418 @@
+import functools
+import os
+import re
+from typing import List, Dict, Tuple, Optional, Any
+from urllib.parse import urlparse
+
+# lxml is optional; without it we fall back to BeautifulSoup's pure-Python parser
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:
+    lxml = None
+
+# Fallback chain for locating the main content of a page, in order of preference.
+# Each entry is a (tag, attrs) pair as passed to BeautifulSoup's find().
+MAIN_CONTENT_SELECTORS = [
+    ('main', {}),
+    ('div', {'id': 'content'}),
+    ('div', {'class': 'content'}),
+    ('article', {}),
+    ('div', {'class': 'entry-content'}),
+    ('div', {'class': 'post-content'}),
+    ('body', {}),
+]
+
+STARTUPBLINK_CONTENT_SELECTORS = [
+    ('div', {'class': 'ecosystem-page'}),
+    ('div', {'id': 'content'}),
+    ('div', {'class': 'content'}),
+    ('main', {}),
+]
+
+# Elements that never carry content worth sending to the LLM
+BOILERPLATE_SELECTORS = [
+    ('nav', {}),
+    ('header', {}),
+    ('footer', {}),
+    ('aside', {}),
+    ('form', {}),
+    ('noscript', {}),
+    ('iframe', {}),
+    ('svg', {}),
+    ('button', {}),
+]
+
+# Elements with a class or id word equal to one of these (or its plural) are dropped too
+# (cookie banners, newsletter boxes, share bars...), unless they wrap the main content.
+# Words are separated by whitespace and KEYWORD_SEPARATORS, so "share-bar" and "cookie_popup"
+# match but "shareholders-list" doesn't
+BOILERPLATE_KEYWORDS = ('cookie', 'consent', 'gdpr', 'newsletter', 'subscribe', 'popup', 'modal',
+                        'share', 'social', 'breadcrumb', 'navbar', 'menu', 'sidebar', 'banner')
+
+# Per-domain extraction rules. "content" selectors are tried before the generic
+# MAIN_CONTENT_SELECTORS chain and "drop" selectors are removed in addition to the
+# generic boilerplate. Keys match the host itself and any of its subdomains.
+DOMAIN_EXTRACTION_RULES = {
+    "cc.cz": {
+        "content": [('div', {'class': 'article-content'}), ('div', {'class': 'entry-content'}), ('article', {})],
+        "drop": [('div', {'class': 'related-articles'}), ('div', {'class': 'author-box'}), ('div', {'class': 'tags'})],
+    },
+    "czechstartups.org": {
+        "content": [('div', {'class': 'startups-list'}), ('div', {'class': 'page-content'}), ('main', {})],
+        "drop": [('div', {'class': 'partners'}), ('section', {'class': 'partners'})],
+    },
+    "seedtable.com": {
+        "content": [('div', {'class': 'company-list'}), ('main', {})],
+        "drop": [('div', {'class': 'cta'}), ('section', {'class': 'faq'})],
+    },
+    "startupblink.com": {
+        "content": STARTUPBLINK_CONTENT_SELECTORS,
+        "drop": [('div', {'class': 'map-container'})],
+    },
+    "wellfound.com": {
+        "content": [('div', {'data-test': 'StartupResults'}), ('main', {})],
+        "drop": [('div', {'data-test': 'SignupModal'})],
+    },
+}
+
+# Text-density fallback: small, link-heavy blocks (menus, tag clouds, "related" lists)
+# are dropped when no domain rule matched the page
+DENSITY_BLOCK_TAGS = ('ul', 'ol', 'div', 'section', 'table', 'dl')
+LINK_DENSITY_THRESHOLD = 0.6   # Share of a block's text that sits inside links
+MAX_LINK_BLOCK_CHARS = 400     # Larger blocks are kept even if link-heavy (e.g. startup lists)
+
+# Which backend to use: "lxml" or "html.parser"
+PARSER_BACKEND = os.getenv("HTML_PARSER_BACKEND", "lxml")
+
+Selector = Tuple[str, Dict[str, str]]
+
+KEYWORD_SEPARATORS = "-_:./"
+
+# Wrappers that must survive boilerplate dropping (ASP.NET pages wrap the whole body in a <form>)
+_PROTECTED_TAGS = ('html', 'body', 'main', 'article')
+
+
+@functools.lru_cache(maxsize=None)
+def keyword_pattern(keywords: Tuple[str, ...]) -> "re.Pattern":
+    """Compile a regex finding any of the keywords (or their plurals) as a whole class or id word."""
+    separators = re.escape(KEYWORD_SEPARATORS)
+    return re.compile(rf"(?:^|[\s{separators}])(?:{'|'.join(keywords)})s?(?=$|[\s{separators}])", re.IGNORECASE)
+
+
+class BeautifulSoupParser:
+    """Pure-Python backend that runs selector chains as sequential soup.find calls."""
+
+    name = "html.parser"
+
+    def parse(self, html: str):
+        # bs4 is slow to import and only needed when this backend is used
+        from bs4 import BeautifulSoup
+        return BeautifulSoup(html, 'html.parser')
+
+    def find_first(self, doc, selectors: List[Selector]):
+        """Return the node matched by the first selector that matches, or None."""
+        for tag, attrs in selectors:
+            node = doc.find(tag, attrs)
+            if node:
+                return node
+        return None
+
+    def text(self, node) -> str:
+        return node.get_text(separator='\n', strip=True)
+
+    def text_length(self, node) -> int:
+        return sum(len(text) for text in node.stripped_strings)
+
+    def links(self, node) -> List[str]:
+        """Return the href of every link under the node."""
+        return [link['href'] for link in node.find_all('a', href=True)]
+
+    @staticmethod
+    def _kept_ids(keep) -> set:
+        """Return the ids of the kept content node and its ancestors."""
+        return {id(keep), *map(id, keep.parents)} if keep is not None else set()
+
+    @staticmethod
+    def _droppable(node, kept_ids: set) -> bool:
+        """Check that a node neither is nor wraps the kept content node or a protected tag."""
+        if node.decomposed or id(node) in kept_ids:
+            return False
+        return node.name not in _PROTECTED_TAGS and not node.find(_PROTECTED_TAGS)
+
+    def drop(self, doc, selectors: List[Selector], keep=None):
+        """Remove every element matching any of the selectors, except around `keep`."""
+        kept_ids = self._kept_ids(keep)
+        for tag, attrs in selectors:
+            for node in doc.find_all(tag, attrs):
+                if self._droppable(node, kept_ids):
+                    node.decompose()
+
+    def drop_keywords(self, doc, keywords: Tuple[str, ...], keep=None):
+        """Remove elements with a class or id word that is a boilerplate keyword, except around `keep`."""
+        pattern = keyword_pattern(keywords)
+
+        def is_boilerplate(node):
+            names = ' '.join(node.get('class') or []) + ' ' + (node.get('id') or '')
+            return bool(pattern.search(names))
+
+        kept_ids = self._kept_ids(keep)
+        for node in doc.find_all(is_boilerplate):
+            if self._droppable(node, kept_ids):
+                node.decompose()
+
+    def drop_link_dense(self, doc, threshold: float, max_chars: int):
+        """Remove small blocks where most of the text is link text."""
+        for node in doc.find_all(DENSITY_BLOCK_TAGS):
+            if node.decomposed:
+                continue
+            total = self.text_length(node)
+            if total == 0 or total > max_chars:
+                continue
+            links = sum(self.text_length(link) for link in node.find_all('a'))
+            if links / total > threshold:
+                node.decompose()
+
+
+class LxmlParser:
+    """
+    lxml backend that compiles each selector chain into one XPath union.
+    The document is searched once and the match with the highest-priority selector wins,
+    which gives the same result as trying each selector in turn.
+    """
+
+    name = "lxml"
+
+    # Text nodes under an element, skipping script and style contents like get_text() does
+    _text_xpath = etree.XPath("descendant::text()[not(parent::script or parent::style)]") if lxml else None
+    _links_xpath = etree.XPath("descendant-or-self::a/@href") if lxml else None
+
+    def __init__(self):
+        self._compiled: Dict[Any, "etree.XPath"] = {}
+
+    @staticmethod
+    def _selector_xpath(tag: str, attrs: Dict[str, str]) -> str:
+        """Translate a (tag, attrs) selector into an XPath expression."""
+        predicates = []
+        for name, value in attrs.items():
+            if name == 'class':
+                # Match a single class token, like BeautifulSoup does
+                predicates.append(f"contains(concat(' ', normalize-space(@class), ' '), ' {value} ')")
+            else:
+                predicates.append(f"@{name}='{value}'")
+        return f"//{tag}" + "".join(f"[{p}]" for p in predicates)
+
+    @staticmethod
+    def _matches(node, tag: str, attrs: Dict[str, str]) -> bool:
+        """Check whether a node satisfies a (tag, attrs) selector."""
+        if node.tag != tag:
+            return False
+        for name, value in attrs.items():
+            if name == 'class':
+                if value not in (node.get('class') or '').split():
+                    return False
+            elif node.get(name) != value:
+                return False
+        return True
+
+    def _compile(self, selectors: List[Selector]) -> "etree.XPath":
+        key = tuple((tag, tuple(sorted(attrs.items()))) for tag, attrs in selectors)
+        query = self._compiled.get(key)
+        if query is None:
+            query = etree.XPath(" | ".join(self._selector_xpath(tag, attrs) for tag, attrs in selectors))
+            self._compiled[key] = query
+        return query
+
+    # Elements that are or wrap a protected tag
+    _protected_xpath = etree.XPath(
+        " or ".join([f"self::{tag}" for tag in _PROTECTED_TAGS] + [f"boolean(.//{tag})" for tag in _PROTECTED_TAGS])
+    ) if lxml else None
+
+    # Elements with a class or id, the candidates for keyword dropping
+    _named_xpath = etree.XPath("//*[@class or @id]") if lxml else None
+
+    def parse(self, html: str):
+        try:
+            return lxml.html.fromstring(html.encode('utf-8'), parser=lxml.html.HTMLParser(encoding='utf-8'))
+        except (etree.ParserError, ValueError):
+            return None
+
+    def find_first(self, doc, selectors: List[Selector]):
+        """Return the node matched by the highest-priority selector, or None."""
+        if doc is None:
+            return None
+
+        best = None
+        best_rank = len(selectors)
+        # Matches come back in document order, so the first one at each rank wins ties
+        for node in self._compile(selectors)(doc):
+            for rank, (tag, attrs) in enumerate(selectors[:best_rank]):
+                if self._matches(node, tag, attrs):
+                    best, best_rank = node, rank
+                    break
+            if best_rank == 0:
+                break
+        return best
+
+    def text(self, node) -> str:
+        strings = (text.strip() for text in self._text_xpath(node))
+        return '\n'.join(text for text in strings if text)
+
+    def text_length(self, node) -> int:
+        return sum(len(text.strip()) for text in self._text_xpath(node))
+
+    def links(self, node) -> List[str]:
+        """Return the href of every link under the node."""
+        return [str(href) for href in self._links_xpath(node)]
+
+    @staticmethod
+    def _drop_nodes(nodes):
+        for node in nodes:
+            if node.getparent() is not None:
+                node.drop_tree()
+
+    def _droppable(self, nodes, keep):
+        """Leave out the nodes that are or wrap the kept content node or a protected tag."""
+        kept = {keep, *keep.iterancestors()} if keep is not None else set()
+        return [node for node in nodes if node not in kept and not self._protected_xpath(node)]
+
+    def drop(self, doc, selectors: List[Selector], keep=None):
+        """Remove every element matching any of the selectors, except around `keep`."""
+        if doc is not None and selectors:
+            self._drop_nodes(self._droppable(self._compile(selectors)(doc), keep))
+
+    def drop_keywords(self, doc, keywords: Tuple[str, ...], keep=None):
+        """Remove elements with a class or id word that is a boilerplate keyword, except around `keep`."""
+        if doc is not None and keywords:
+            pattern = keyword_pattern(keywords)
+            matches = [node for node in self._named_xpath(doc)
+                       if pattern.search(f"{node.get('class') or ''} {node.get('id') or ''}")]
+            self._drop_nodes(self._droppable(matches, keep))
+
+    def drop_link_dense(self, doc, threshold: float, max_chars: int):
+        """Remove small blocks where most of the text is link text."""
+        if doc is None:
+            return
+
+        link_dense = []
+        for node in doc.iter(*DENSITY_BLOCK_TAGS):
+            total = self.text_length(node)
+            if total == 0 or total > max_chars:
+                continue
+            links = sum(self.text_length(link) for link in node.iter('a'))
+            if links / total > threshold:
+                link_dense.append(node)
+        self._drop_nodes(link_dense)
+
+
+_parsers = {
+    BeautifulSoupParser.name: BeautifulSoupParser(),
+}
+if lxml is not None:
+    _parsers[LxmlParser.name] = LxmlParser()
+
+
+def get_parser(name: str = None):
+    """Return the requested parser backend, falling back to BeautifulSoup if it isn't available."""
+    return _parsers.get(name or PARSER_BACKEND) or _parsers[BeautifulSoupParser.name]
+
+
+def get_domain_rules(url: str) -> Dict[str, List[Selector]]:
+    """Return the extraction rules for the site a URL belongs to (empty if there are none)."""
+    host = urlparse(url).netloc.lower() if url else ""
+    for domain, rules in DOMAIN_EXTRACTION_RULES.items():
+        if host == domain or host.endswith("." + domain):
+            return rules
+    return {}
+
+
+def _extract_main_text(parser, html: str, selectors: List[Selector]) -> Optional[str]:
+    doc = parser.parse(html)
+    node = parser.find_first(doc, selectors) if doc is not None else None
+    return parser.text(node) if node is not None else None
+
+
+def extract_main_text(html: str, selectors: List[Selector] = None, backend: str = None) -> Optional[str]:
+    """
+    Locate the main content of a page and return its text, one string per line.
+    Tries the selectors in order of preference (MAIN_CONTENT_SELECTORS by default)
+    and returns None if none of them match.
+    """
+    selectors = selectors or MAIN_CONTENT_SELECTORS
+    parser = get_parser(backend)
+
+    try:
+        return _extract_main_text(parser, html, selectors)
+    except Exception as e:
+        if parser.name == BeautifulSoupParser.name:
+            raise
+        print(f"{parser.name} parser failed ({e}), falling back to BeautifulSoup")
+        return _extract_main_text(_parsers[BeautifulSoupParser.name], html, selectors)
+
+
+def _extract_content(parser, html: str, url: str, selectors: List[Selector]) -> Tuple[Optional[str], Dict[str, int], List[str]]:
+    doc = parser.parse(html)
+    if doc is None:
+        return None, {'chars_total': 0, 'chars_kept': 0, 'chars_dropped': 0}, []
+
+    body = parser.find_first(doc, [('body', {})])
+    chars_total = parser.text_length(body if body is not None else doc)
+
+    # Email links are contacts wherever they are, so collect them before footers are dropped
+    mailto_links = [href for href in parser.links(doc) if href.lower().startswith('mailto:')]
+
+    # Locate the content before dropping boilerplate, so the elements wrapping it are kept
+    # even if they look like boilerplate (e.g. an ASP.NET <form> around the whole page)
+    rules = get_domain_rules(url)
+    node = parser.find_first(doc, rules['content']) if rules.get('content') else None
+    keep = node if node is not None else parser.find_first(doc, selectors or MAIN_CONTENT_SELECTORS)
+    parser.drop(doc, BOILERPLATE_SELECTORS + rules.get('drop', []), keep)
+    parser.drop_keywords(doc, BOILERPLATE_KEYWORDS, keep)
+
+    # A matching domain rule is trusted as-is; otherwise fall back to the generic
+    # chain and strip link-heavy blocks by text density
+    if node is None:
+        parser.drop_link_dense(doc, LINK_DENSITY_THRESHOLD, MAX_LINK_BLOCK_CHARS)
+        node = parser.find_first(doc, selectors or MAIN_CONTENT_SELECTORS)
+
+    text = parser.text(node) if node is not None else None
+    links = parser.links(node) if node is not None else []
+    # Measured like chars_total, without the separators text() joins the strings with
+    chars_kept = parser.text_length(node) if node is not None else 0
+    return text, {
+        'chars_total': chars_total,
+        'chars_kept': chars_kept,
+        'chars_dropped': chars_total - chars_kept,
+    }, mailto_links + [href for href in links if href not in mailto_links]
+
+
+def extract_content_and_links(html: str, url: str = None, selectors: List[Selector] = None,
+                              backend: str = None) -> Tuple[Optional[str], Dict[str, int], List[str]]:
+    """
+    Like extract_content, but also return the href of every link in the kept content
+    plus every mailto: link on the page, as found in the page (possibly relative).
+    """
+    parser = get_parser(backend)
+
+    try:
+        return _extract_content(parser, html, url, selectors)
+    except Exception as e:
+        if parser.name == BeautifulSoupParser.name:
+            raise
+        print(f"{parser.name} parser failed ({e}), falling back to BeautifulSoup")
+        return _extract_content(_parsers[BeautifulSoupParser.name], html, url, selectors)
+
+
+def extract_content(html: str, url: str = None, selectors: List[Selector] = None,
+                    backend: str = None) -> Tuple[Optional[str], Dict[str, int]]:
+    """
+    Extract the useful text of a page, without navigation, cookie banners, footers and
+    other boilerplate.
+
+    Applies the DOMAIN_EXTRACTION_RULES for the page's site first. Pages without a matching
+    rule go through the generic selector chain (MAIN_CONTENT_SELECTORS by default) after
+    link-heavy blocks are stripped. Returns the text (None if nothing matched) and a stats
+    dict with 'chars_total', 'chars_kept' and 'chars_dropped'.
+    """
+    text, stats, _ = extract_content_and_links(html, url, selectors, backend)
+    return text, stats
@@ -0,0 +1,202 @@
+import difflib
+import functools
+import itertools
+from collections import Counter
+from typing import Dict, Any, List, Optional, Set
+from urllib.parse import urlsplit
+import utils
+
+# Length of the character n-grams of company names used to find candidate duplicates
+NGRAM_SIZE = 3
+
+# Candidate pairs must share at least this many name n-grams (or the website domain)
+MIN_SHARED_NGRAMS = 2
+
+# N-grams found in more names than this (e.g. "tec" of "...tech") are too common to
+# narrow down the candidates, so they are not used for blocking
+MAX_BLOCK_SIZE = 50
+
+# Pairs of records scoring at least this are treated as the same company
+MATCH_THRESHOLD = 0.85
+
+# Score taken off name matches of companies in two different known cities
+CITY_MISMATCH_PENALTY = 0.2
+
+# Records on the same website domain still need names at least this similar (or one name
+# containing the other), so different companies sharing a domain are never merged
+SAME_DOMAIN_NAME_SIMILARITY = 0.5
+
+# Directory, social and profile sites whose URLs list many companies: a startup's "website"
+# on one of these says nothing about its identity. The scraped sources are added below
+NON_IDENTITY_DOMAINS = {
+    "linkedin.com", "facebook.com", "instagram.com", "twitter.com", "x.com", "youtube.com",
+    "github.com", "medium.com", "crunchbase.com", "dealroom.co", "wellfound.com", "angel.co",
+    "seedtable.com", "startupblink.com", "f6s.com", "tracxn.com", "pitchbook.com",
+    "czechstartups.org", "cc.cz", "google.com", "wikipedia.org",
+}
+
+
+def name_ngrams(name_key: str) -> Set[str]:
+    """Return the character n-grams of a company name key, padded so short names have some."""
+    padded = f"^{name_key}$"
+    return {padded[i:i + NGRAM_SIZE] for i in range(len(padded) - NGRAM_SIZE + 1)}
+
+
+@functools.lru_cache(maxsize=None)
+def get_suffix_extractor():
+    """
+    Return a public-suffix-aware domain parser using the list bundled with tldextract
+    (never downloaded). Private suffixes such as github.io count, so every project page
+    on them is its own domain.
+    """
+    import tldextract
+    return tldextract.TLDExtract(suffix_list_urls=(), cache_dir=None, include_psl_private_domains=True)
+
+
+def registered_domain(host: str) -> Optional[str]:
+    """Return the domain registered under a public suffix ("app.kiwi.co.uk" -> "kiwi.co.uk"), or None."""
+    parts = get_suffix_extractor()(host)
+    return f"{parts.domain}.{parts.suffix}" if parts.domain and parts.suffix else None
+
+
+@functools.lru_cache(maxsize=None)
+def non_identity_domains() -> Set[str]:
+    """Return NON_IDENTITY_DOMAINS plus the domains of the scraped sources themselves."""
+    source_domains = {registered_domain(urlsplit(url).hostname or "") for url in utils.CZECH_STARTUP_SOURCES}
+    return NON_IDENTITY_DOMAINS | {domain for domain in source_domains if domain}
+
+
+def get_domain(website: str) -> Optional[str]:
+    """
+    Return the registered domain identifying a company's website ("app.kiwi.com" -> "kiwi.com"),
+    or None if there is no website or it is a directory, social or scraped-source page.
+    """
+    normalized = utils.normalize_url(website) if website else None
+    if not normalized:
+        return None
+    domain = registered_domain(urlsplit(normalized).hostname)
+    if not domain or domain in non_identity_domains():
+        return None
+    return domain
+
+
+def name_similarity(a: str, b: str) -> float:
+    """Return how similar two company name keys are, from 0 to 1."""
+    return 1.0 if a == b else difflib.SequenceMatcher(None, a, b).ratio()
+
+
+def prepare(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Compute the fields records are compared on: name key, n-grams, domain and city."""
+    key = utils.company_name_key(record.get("name") or "")
+    return {
+        "key": key,
+        "ngrams": name_ngrams(key),
+        "domain": get_domain(record.get("website") or ""),
+        "city": (record.get("city") or "").strip().lower(),
+    }
+
+
+def match_score(a: Dict[str, Any], b: Dict[str, Any]) -> float:
+    """
+    Score how likely two prepared records are the same company, from 0 to 1.
+    Records with different website domains never match. Records on the same domain match
+    if their names are also alike; otherwise the name keys are compared, and different
+    known cities lower the score.
+    """
+    similarity = name_similarity(a["key"], b["key"])
+    if a["domain"] and b["domain"]:
+        if a["domain"] != b["domain"]:
+            return 0.0
+        contained = a["key"] in b["key"] or b["key"] in a["key"]
+        return 1.0 if contained or similarity >= SAME_DOMAIN_NAME_SIMILARITY else 0.0
+
+    score = similarity
+    if a["city"] and b["city"] and a["city"] != b["city"]:
+        score -= CITY_MISMATCH_PENALTY
+    return score
+
+
+def candidate_pairs(entries: List[Dict[str, Any]]) -> Set[tuple]:
+    """
+    Return the index pairs of prepared records worth scoring: those sharing a website
+    domain or at least MIN_SHARED_NGRAMS name n-grams. Blocking on these keys avoids
+    comparing every record with every other one.
+    """
+    domain_blocks = {}
+    ngram_blocks = {}
+    for i, entry in enumerate(entries):
+        if entry["domain"]:
+            domain_blocks.setdefault(entry["domain"], []).append(i)
+        for ngram in entry["ngrams"]:
+            ngram_blocks.setdefault(ngram, []).append(i)
+
+    pairs = set()
+    for members in domain_blocks.values():
+        pairs.update(itertools.combinations(members, 2))
+
+    shared = Counter()
+    for members in ngram_blocks.values():
+        if len(members) <= MAX_BLOCK_SIZE:
+            shared.update(itertools.combinations(members, 2))
+    pairs.update(pair for pair, count in shared.items() if count >= MIN_SHARED_NGRAMS)
+    return pairs
+
+
+class DisjointSet:
+    """Union-find over the indices 0..size-1, used to group matching records into clusters."""
+
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i: int, j: int):
+        root_i, root_j = self.find(i), self.find(j)
+        if root_i != root_j:
+            # The earlier record stays the root, so clusters keep their first appearance's order
+            self.parent[max(root_i, root_j)] = min(root_i, root_j)
+
+
+def merge_records(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Merge the records of one company: the most frequent name (the shortest on a tie),
+    the first website on the company's own domain (rather than a directory page), and
+    the first non-empty value of every other field.
+    """
+    names = Counter(record["name"] for record in records)
+    merged = {}
+    for record in records:
+        for field, value in record.items():
+            if not merged.get(field):
+                merged[field] = value
+    merged["name"] = min(names, key=lambda name: (-names[name], len(name)))
+    own_websites = [record["website"] for record in records if get_domain(record.get("website") or "")]
+    if own_websites:
+        merged["website"] = own_websites[0]
+    return merged
+
+
+def resolve_startups(records: List[Dict[str, Any]], threshold: float = MATCH_THRESHOLD) -> List[Dict[str, Any]]:
+    """
+    Collapse records of the same company, named slightly differently or with different
+    URLs by different sources, into one. Returns the merged records in order of first appearance.
+    """
+    entries = [prepare(record) for record in records]
+    clusters = DisjointSet(len(records))
+    for i, j in candidate_pairs(entries):
+        if match_score(entries[i], entries[j]) >= threshold:
+            clusters.union(i, j)
+
+    groups = {}
+    for i, record in enumerate(records):
+        if entries[i]["key"]:
+            groups.setdefault(clusters.find(i), []).append(record)
+
+    resolved = [merge_records(group) for group in groups.values()]
+    if len(resolved) < len(records):
+        print(f"Resolved {len(records)} startup records into {len(resolved)} companies")
+    return resolved
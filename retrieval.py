@@ -0,0 +1,282 @@
+import os
+import re
+import math
+import array
+import hashlib
+import functools
+import unicodedata
+from collections import Counter
+from typing import Dict, Any, List, Optional, Tuple, Callable
+from cache import SQLiteCache
+
+# "bm25" ranks passages by keywords, "hybrid" also by meaning with a local embedding
+# model (needs sentence-transformers), "off" sends all scraped content to the LLM
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "bm25").lower()
+
+# Content above this many tokens is reduced to the passages most relevant to the
+# analysis questions, at most this many tokens in total
+RETRIEVAL_TOKEN_BUDGET = int(os.getenv("RETRIEVAL_TOKEN_BUDGET", 4000))
+
+# Passages considered per question
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", 12))
+
+# Passages are consecutive lines of a source, up to this many words
+PASSAGE_WORDS = 80
+
+# Local CPU embedding model used in hybrid mode
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+
+# BM25 parameters: term frequency saturation and document length normalization
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Reciprocal rank fusion constant for combining the BM25 and embedding rankings
+RRF_K = 60
+
+# One search query per question the analysis prompt asks
+QUESTION_QUERIES = {
+    "number_of_startups": "number of startups total count companies ecosystem estimate rank ranking",
+    "top_cities": "city cities startups based located headquartered Prague Praha Brno Ostrava hub",
+    "key_industries": "industry industries sector sectors fintech AI software healthtech e-commerce focus",
+    "startups": "startup company founded founders product platform raised funding round",
+    "insights": "ecosystem growth investment investors venture capital trend accelerator support",
+}
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase words without diacritics, so "Praha" matches "praha"."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    return _TOKEN_PATTERN.findall("".join(c for c in text if not unicodedata.combining(c)))
+
+
+def split_passages(sources: List[Tuple[Optional[str], str]]) -> List[Dict[str, Any]]:
+    """
+    Split (url, text) sources into passages of consecutive lines up to PASSAGE_WORDS
+    words. Longer lines are split on their own. Each passage keeps its source URL.
+    """
+    passages = []
+    for url, text in sources:
+        current = []
+        current_words = 0
+        for line in text.split("\n"):
+            words = line.split()
+            while len(words) > PASSAGE_WORDS:
+                passages.append({"url": url, "text": " ".join(words[:PASSAGE_WORDS])})
+                words = words[PASSAGE_WORDS:]
+            if current and current_words + len(words) > PASSAGE_WORDS:
+                passages.append({"url": url, "text": "\n".join(current)})
+                current, current_words = [], 0
+            if words:
+                current.append(" ".join(words))
+                current_words += len(words)
+        if current:
+            passages.append({"url": url, "text": "\n".join(current)})
+    return passages
+
+
+class BM25Index:
+    """
+    Okapi BM25 keyword index over a list of passages, kept in memory.
+    Queries only visit the postings of their own terms.
+    """
+
+    def __init__(self, texts: List[str], k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.lengths = []
+        self.postings: Dict[str, Dict[int, int]] = {}
+        for i, text in enumerate(texts):
+            terms = Counter(tokenize(text))
+            self.lengths.append(sum(terms.values()))
+            for term, count in terms.items():
+                self.postings.setdefault(term, {})[i] = count
+        self.average_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0
+
+    def idf(self, term: str) -> float:
+        """Return the inverse document frequency of a term; rarer terms weigh more."""
+        n = len(self.lengths)
+        df = len(self.postings.get(term, {}))
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def rank(self, query: str, limit: int) -> List[int]:
+        """Return the indices of the passages matching the query best, best first."""
+        scores = Counter()
+        for term in set(tokenize(query)):
+            idf = self.idf(term)
+            for i, tf in self.postings.get(term, {}).items():
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[i] / (self.average_length or 1))
+                scores[i] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return [i for i, _ in scores.most_common(limit)]
+
+
+class EmbeddingCache(SQLiteCache):
+    """
+    Persistent store of passage embeddings keyed by model and passage hash, so each
+    passage is only embedded once, however many runs it appears in.
+    """
+
+    filename = "embeddings.sqlite"
+    schema = ("""
+        CREATE TABLE IF NOT EXISTS embeddings (
+            model TEXT NOT NULL,
+            text_hash TEXT NOT NULL,
+            vector BLOB NOT NULL,
+            PRIMARY KEY (model, text_hash)
+        ) WITHOUT ROWID
+    """,)
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        """Hash a passage's text into its key."""
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get_many(self, model: str, texts: List[str]) -> Dict[str, List[float]]:
+        """Return the stored vectors of the given texts by text hash; missing ones are left out."""
+        hashes = [self.text_hash(text) for text in texts]
+        vectors = {}
+        with self._connect() as conn:
+            # Stay under SQLite's limit on query parameters
+            for start in range(0, len(hashes), 500):
+                batch = hashes[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({','.join('?' * len(batch))})",
+                    [model] + batch
+                ).fetchall()
+                for text_hash, vector in rows:
+                    vectors[text_hash] = array.array("f", vector).tolist()
+        return vectors
+
+    def put_many(self, model: str, texts: List[str], vectors: List[List[float]]):
+        """Store the vectors of the given texts."""
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector) VALUES (?, ?, ?)",
+                [(model, self.text_hash(text), array.array("f", vector).tobytes()) for text, vector in zip(texts, vectors)]
+            )
+
+
+@functools.lru_cache(maxsize=None)
+def get_embedding_model(model_name: str = EMBEDDING_MODEL):
+    """
+    Load the local embedding model once, or return None if sentence-transformers
+    isn't installed or the model can't be loaded.
+    """
+    try:
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(model_name, device="cpu")
+    except Exception as e:
+        print(f"Embedding model {model_name} is not available, using keyword retrieval only: {e}")
+        return None
+
+
+class EmbeddingIndex:
+    """
+    Dense index of passage embeddings from a local model, searched by cosine similarity.
+    Embeddings are persisted in an EmbeddingCache and only computed for new passages.
+    """
+
+    def __init__(self, texts: List[str], model, model_name: str = EMBEDDING_MODEL, store: EmbeddingCache = None):
+        self.model = model
+        self.model_name = model_name
+        self.store = store or EmbeddingCache()
+        self.vectors = self.embed(texts)
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Return normalized embeddings of the texts, computing and storing the missing ones."""
+        stored = self.store.get_many(self.model_name, texts)
+        missing = list({text for text in texts if EmbeddingCache.text_hash(text) not in stored})
+        if missing:
+            vectors = self.model.encode(missing, normalize_embeddings=True).tolist()
+            self.store.put_many(self.model_name, missing, vectors)
+            stored.update((EmbeddingCache.text_hash(text), vector) for text, vector in zip(missing, vectors))
+        return [stored[EmbeddingCache.text_hash(text)] for text in texts]
+
+    def rank(self, query: str, limit: int) -> List[int]:
+        """Return the indices of the passages closest in meaning to the query, best first."""
+        query_vector = self.embed([query])[0]
+        scores = [sum(q * v for q, v in zip(query_vector, vector)) for vector in self.vectors]
+        return sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)[:limit]
+
+
+class PassageRetriever:
+    """
+    Ranks passages for a query with BM25, fused with an embedding ranking in hybrid mode.
+    """
+
+    def __init__(self, passages: List[Dict[str, Any]], mode: str = RETRIEVAL_MODE):
+        texts = [passage["text"] for passage in passages]
+        self.bm25 = BM25Index(texts)
+        self.embeddings = None
+        if mode == "hybrid":
+            model = get_embedding_model()
+            if model is not None:
+                self.embeddings = EmbeddingIndex(texts, model)
+
+    def rank(self, query: str, limit: int) -> List[int]:
+        """Return the indices of the best passages for a query, best first."""
+        if self.embeddings is None:
+            return self.bm25.rank(query, limit)
+
+        # Reciprocal rank fusion of the keyword and embedding rankings
+        fused = Counter()
+        for ranking in (self.bm25.rank(query, limit * 2), self.embeddings.rank(query, limit * 2)):
+            for position, i in enumerate(ranking):
+                fused[i] += 1 / (RRF_K + position + 1)
+        return [i for i, _ in fused.most_common(limit)]
+
+
+def select_passages(passages: List[Dict[str, Any]], count_tokens: Callable[[str], int],
+                    budget: int = RETRIEVAL_TOKEN_BUDGET, top_k: int = RETRIEVAL_TOP_K,
+                    mode: str = RETRIEVAL_MODE) -> List[int]:
+    """
+    Pick the passages to send to the LLM: the top_k passages of every question, taken in
+    turns (each question's best passage first, then each one's second best...) until the
+    token budget is used up. Returns their indices in their original order.
+    If no passage matches any question, the leading passages are taken instead.
+    """
+    retriever = PassageRetriever(passages, mode)
+    rankings = [retriever.rank(query, top_k) for query in QUESTION_QUERIES.values()]
+
+    selected = set()
+    used = 0
+    for position in range(top_k):
+        for ranking in rankings:
+            if position >= len(ranking) or ranking[position] in selected:
+                continue
+            i = ranking[position]
+            tokens = count_tokens(passages[i]["text"])
+            if used + tokens <= budget:
+                selected.add(i)
+                used += tokens
+
+    # Nothing matched any question: fall back to the start of the content
+    if not selected:
+        for i, passage in enumerate(passages):
+            used += count_tokens(passage["text"])
+            if used > budget:
+                break
+            selected.add(i)
+    return sorted(selected)
+
+
+def build_compact_content(sources: List[Tuple[Optional[str], str]], count_tokens: Callable[[str], int],
+                          budget: int = RETRIEVAL_TOKEN_BUDGET, mode: str = RETRIEVAL_MODE) -> str:
+    """
+    Reduce the (url, text) sources to the passages most relevant to the analysis questions,
+    within the token budget, grouped under their "--- DATA FROM <url> ---" markers.
+    """
+    passages = split_passages(sources)
+    selected = select_passages(passages, count_tokens, budget, mode=mode)
+
+    parts = []
+    current_url = object()
+    for i in selected:
+        url = passages[i]["url"]
+        if url != current_url:
+            if url:
+                parts.append(f"--- DATA FROM {url} ---\n")
+            current_url = url
+        parts.append(passages[i]["text"] + "\n")
+    return "\n".join(parts).strip()
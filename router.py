@@ -0,0 +1,114 @@
+import os
+import time
+import threading
+from collections import Counter, deque
+from typing import Dict, List, Any, Iterator, Tuple, TYPE_CHECKING
+
+# The OpenAI client and langchain_openai are slow to import, so they are imported on first use
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
+
+# Model tiers from strongest to cheapest. Each call gets `timeout` seconds before it is
+# abandoned and retried one tier down; the cheapest tier keeps the client's own retries
+MODEL_TIERS = [
+    {"name": "strong", "model": os.getenv("STRONG_MODEL", "gpt-4"), "timeout": 90},
+    {"name": "fast", "model": os.getenv("FAST_MODEL", "gpt-3.5-turbo"), "timeout": 45},
+]
+
+# Tier each task starts on: extraction from a single chunk or source is cheap work,
+# synthesizing a full analysis or merging partial ones needs the strong model
+TASK_TIERS = {
+    "extract": "fast",
+    "synthesize": "strong",
+}
+
+# Number of recent calls kept in the call log
+MAX_LOGGED_CALLS = 1000
+
+# Prompts below this many tokens go to the cheapest tier whatever the task,
+# e.g. the short Google snippet fallback
+SMALL_PROMPT_TOKENS = 1500
+
+TEMPERATURE = 0.2
+MAX_OUTPUT_TOKENS = 1500
+
+
+def is_downgradable_error(error: Exception) -> bool:
+    """Return True if a call failed by running out of time or being rate limited."""
+    import openai
+    
+    if isinstance(error, (openai.APITimeoutError, openai.RateLimitError, TimeoutError)):
+        return True
+    return getattr(error, 'status_code', None) == 429
+
+
+class ModelRouter:
+    """
+    Picks the model tier for each LLM call from the task and the prompt size, and falls
+    back to the next cheaper tier when a call times out or is rate limited.
+    Every call is recorded with the tier that served it.
+    """
+
+    def __init__(self, tiers: List[Dict[str, Any]] = None, task_tiers: Dict[str, str] = None,
+                 small_prompt_tokens: int = SMALL_PROMPT_TOKENS):
+        self.tiers = tiers or MODEL_TIERS
+        self.task_tiers = task_tiers or TASK_TIERS
+        self.small_prompt_tokens = small_prompt_tokens
+        self.calls = deque(maxlen=MAX_LOGGED_CALLS)
+        self._calls_lock = threading.Lock()
+        self._models = {}
+
+    def get_model(self, tier: Dict[str, Any]) -> "ChatOpenAI":
+        """Return the chat model for a tier, creating it on first use."""
+        if tier["name"] not in self._models:
+            from langchain_openai import ChatOpenAI
+
+            is_last_tier = tier is self.tiers[-1]
+            self._models[tier["name"]] = ChatOpenAI(
+                model_name=tier["model"],
+                temperature=TEMPERATURE,
+                max_tokens=MAX_OUTPUT_TOKENS,
+                request_timeout=tier["timeout"],
+                # Retrying a slow or rate-limited tier would eat the latency budget; downgrade instead
+                max_retries=2 if is_last_tier else 0
+            )
+        return self._models[tier["name"]]
+
+    def route(self, task: str, prompt_tokens: int) -> List[Dict[str, Any]]:
+        """
+        Return the tiers to try for a call, starting with the one picked for the task
+        and prompt size, followed by the cheaper ones to fall back on.
+        """
+        names = [tier["name"] for tier in self.tiers]
+        if prompt_tokens < self.small_prompt_tokens:
+            start = len(names) - 1
+        else:
+            start = names.index(self.task_tiers.get(task, names[0]))
+        return self.tiers[start:]
+
+    def candidates(self, task: str, prompt_tokens: int) -> Iterator[Tuple[Dict[str, Any], "ChatOpenAI"]]:
+        """Yield (tier, model) pairs to try for a call, in order."""
+        for tier in self.route(task, prompt_tokens):
+            yield tier, self.get_model(tier)
+
+    def cache_identity(self) -> List[Any]:
+        """Describe the tier setup, for keys of results that depend on the models used."""
+        return [(tier["name"], tier["model"]) for tier in self.tiers] + [self.task_tiers, TEMPERATURE, MAX_OUTPUT_TOKENS]
+
+    def record(self, task: str, tier: Dict[str, Any], prompt_tokens: int, started: float, outcome: str):
+        """Record a call attempt and the tier that handled it."""
+        call = {
+            'task': task,
+            'tier': tier["name"],
+            'model': tier["model"],
+            'prompt_tokens': prompt_tokens,
+            'latency': round(time.time() - started, 2),
+            'outcome': outcome
+        }
+        with self._calls_lock:
+            self.calls.append(call)
+
+    def stats(self) -> Dict[str, int]:
+        """Count the calls each tier served, including cache hits."""
+        with self._calls_lock:
+            return dict(Counter(call['tier'] for call in self.calls if call['outcome'] in ("ok", "cached")))
@@ -0,0 +1,20 @@
+from typing import List, Union
+from pydantic import BaseModel, Field
+
+
+class Startup(BaseModel):
+    """A single startup named in the scraped data."""
+    name: str = Field(description="Company name as written in the data")
+    city: str = Field("", description="City where the company is based, if given")
+    industry: str = Field("", description="Main industry or sector, if given")
+    website: str = Field("", description="Company website, only if it appears in the data")
+    source_url: str = Field("", description="URL from the '--- DATA FROM ... ---' header of the section naming the company")
+
+
+class StartupAnalysis(BaseModel):
+    """Structured analysis of the startup ecosystem in the Czech Republic."""
+    number_of_startups: Union[str, int] = Field("", description="Estimated number of startups, as a number or range")
+    top_cities: List[str] = Field(default_factory=list, description="Top 3-5 startup cities, as 'City: brief description'")
+    key_industries: List[str] = Field(default_factory=list, description="Main industries, as 'Industry: brief description'")
+    startups: List[Startup] = Field(default_factory=list, description="Up to 25 individual startups named in the data")
+    insights: str = Field("", description="Additional insights or caveats about the analysis")
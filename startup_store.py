@@ -0,0 +1,185 @@
+import time
+from typing import Dict, Any, List, Optional, Tuple
+import resolve
+from cache import SQLiteCache
+
+# Columns that startups can be grouped by in counts_by
+AGGREGATE_COLUMNS = ("city", "industry")
+
+
+class StartupStore(SQLiteCache):
+    """
+    Local database of the individual startups found by the analyses, one record per company
+    with its name, city, industry, website, LinkedIn page, the source it was found on and
+    when it was first and last seen. Companies are matched by website domain, then by exact
+    and fuzzy name (see resolve.py), so repeated runs update records instead of duplicating them.
+    Indexed on domain, city and industry so the app can query it without the network or the LLM,
+    and on name n-grams to find fuzzy name matches without scanning every record.
+    """
+
+    filename = "startups.sqlite"
+    schema = ("""
+        CREATE TABLE IF NOT EXISTS startups (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            name_key TEXT NOT NULL,
+            domain TEXT,
+            city TEXT NOT NULL DEFAULT '',
+            industry TEXT NOT NULL DEFAULT '',
+            website TEXT NOT NULL DEFAULT '',
+            linkedin TEXT NOT NULL DEFAULT '',
+            source_url TEXT NOT NULL DEFAULT '',
+            first_seen REAL NOT NULL,
+            last_seen REAL NOT NULL
+        )
+    """, """
+        DROP INDEX IF EXISTS startups_domain
+    """, """
+        CREATE INDEX IF NOT EXISTS startups_domain_lookup ON startups (domain) WHERE domain IS NOT NULL
+    """, """
+        CREATE INDEX IF NOT EXISTS startups_name_key ON startups (name_key)
+    """, """
+        CREATE TABLE IF NOT EXISTS startup_ngrams (
+            ngram TEXT NOT NULL,
+            startup_id INTEGER NOT NULL,
+            PRIMARY KEY (ngram, startup_id)
+        ) WITHOUT ROWID
+    """, """
+        CREATE INDEX IF NOT EXISTS startups_city ON startups (city COLLATE NOCASE)
+    """, """
+        CREATE INDEX IF NOT EXISTS startups_industry ON startups (industry COLLATE NOCASE)
+    """)
+
+    # Fuzzy candidates scored per record, those sharing the most name n-grams first
+    max_candidates = 20
+
+    def find_fuzzy_match(self, conn, entry: Dict[str, Any]) -> Optional[int]:
+        """
+        Return the id of the stored startup best matching a prepared record (resolve.prepare)
+        by name, if it scores at least resolve.MATCH_THRESHOLD.
+        """
+        ngrams = sorted(entry["ngrams"])
+        candidates = conn.execute(
+            f"SELECT s.id, s.name_key, s.domain, s.city FROM startup_ngrams g JOIN startups s ON s.id = g.startup_id "
+            f"WHERE g.ngram IN ({','.join('?' * len(ngrams))}) GROUP BY s.id HAVING COUNT(*) >= ? "
+            f"ORDER BY COUNT(*) DESC LIMIT ?",
+            ngrams + [resolve.MIN_SHARED_NGRAMS, self.max_candidates]
+        ).fetchall()
+
+        best_id, best_score = None, resolve.MATCH_THRESHOLD
+        for startup_id, name_key, domain, city in candidates:
+            candidate = {"key": name_key, "domain": domain, "city": city.strip().lower()}
+            score = resolve.match_score(entry, candidate)
+            if score >= best_score:
+                best_id, best_score = startup_id, score
+        return best_id
+
+    def upsert(self, records: List[Dict[str, Any]]) -> int:
+        """
+        Insert or update startup records as produced by utils.normalize_startups and return
+        how many were saved. Known fields of an existing record are only overwritten by
+        non-empty values; first_seen is kept and last_seen is set to now.
+        """
+        now = time.time()
+        saved = 0
+        with self._connect() as conn:
+            # Take the write lock up front so concurrent jobs can't insert the same company twice
+            conn.execute("BEGIN IMMEDIATE")
+            for record in records:
+                entry = resolve.prepare(record)
+                name_key, domain = entry["key"], entry["domain"]
+                if not name_key:
+                    continue
+
+                row = None
+                if domain:
+                    # The same domain only identifies the company if the names agree too
+                    for candidate_id, candidate_key, candidate_city in conn.execute(
+                            "SELECT id, name_key, city FROM startups WHERE domain = ?", (domain,)).fetchall():
+                        candidate = {"key": candidate_key, "domain": domain, "city": candidate_city.strip().lower()}
+                        if resolve.match_score(entry, candidate) >= resolve.MATCH_THRESHOLD:
+                            row = (candidate_id,)
+                            break
+                if row is None:
+                    # A record with the same name matches unless both have different websites
+                    row = conn.execute(
+                        "SELECT id FROM startups WHERE name_key = ? AND (domain IS NULL OR ? IS NULL) "
+                        "ORDER BY last_seen DESC LIMIT 1",
+                        (name_key, domain)
+                    ).fetchone()
+                if row is None:
+                    startup_id = self.find_fuzzy_match(conn, entry)
+                    row = (startup_id,) if startup_id else None
+
+                values = (
+                    record.get("city", ""),
+                    record.get("industry", ""),
+                    record.get("website", ""),
+                    record.get("linkedin", ""),
+                    record.get("source_url", ""),
+                )
+                if row:
+                    conn.execute(
+                        "UPDATE startups SET "
+                        "city = COALESCE(NULLIF(?, ''), city), "
+                        "industry = COALESCE(NULLIF(?, ''), industry), "
+                        "website = COALESCE(NULLIF(?, ''), website), "
+                        "linkedin = COALESCE(NULLIF(?, ''), linkedin), "
+                        "source_url = COALESCE(NULLIF(?, ''), source_url), "
+                        "domain = COALESCE(?, domain), last_seen = ? WHERE id = ?",
+                        values + (domain, now, row[0])
+                    )
+                else:
+                    startup_id = conn.execute(
+                        "INSERT INTO startups (city, industry, website, linkedin, source_url, "
+                        "name, name_key, domain, first_seen, last_seen) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        values + (record["name"].strip(), name_key, domain, now, now)
+                    ).lastrowid
+                    conn.executemany(
+                        "INSERT INTO startup_ngrams (ngram, startup_id) VALUES (?, ?)",
+                        [(ngram, startup_id) for ngram in entry["ngrams"]]
+                    )
+                saved += 1
+        return saved
+
+    def count(self) -> int:
+        """Return the number of startups in the store."""
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM startups").fetchone()[0]
+
+    def counts_by(self, column: str, limit: int = 20) -> List[Tuple[str, int]]:
+        """Return (value, count) pairs of the most common cities or industries, most common first."""
+        if column not in AGGREGATE_COLUMNS:
+            raise ValueError(f"Cannot group startups by '{column}'")
+
+        with self._connect() as conn:
+            return conn.execute(
+                f"SELECT MIN({column}), COUNT(*) AS n FROM startups WHERE {column} != '' "
+                f"GROUP BY {column} COLLATE NOCASE ORDER BY n DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+
+    def find(self, city: str = None, industry: str = None, domain: str = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """Return the startups matching all the given filters, most recently seen first."""
+        conditions = []
+        params = []
+        if city:
+            conditions.append("city = ? COLLATE NOCASE")
+            params.append(city)
+        if industry:
+            conditions.append("industry = ? COLLATE NOCASE")
+            params.append(industry)
+        if domain:
+            conditions.append("domain = ?")
+            params.append(domain)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT name, city, industry, website, linkedin, source_url, first_seen, last_seen "
+                f"FROM startups {where} ORDER BY last_seen DESC LIMIT ?",
+                params + [limit]
+            ).fetchall()
+
+        columns = ("name", "city", "industry", "website", "linkedin", "source_url", "first_seen", "last_seen")
+        return [dict(zip(columns, row)) for row in rows]
@@ -1,8 +1,14 @@
+import time
 import streamlit as st
+import jobs
 import main
 import utils
 import json
 import re
+from cache import ResultStore
+
+# Seconds between progress checks while an analysis is running
+POLL_INTERVAL = 1.0
 
 def display_contact_info(contact_info):
     """Display contact information in a formatted way."""
@@ -23,60 +29,155 @@ def display_contact_info(contact_info):
                 linkedin = f"https://{linkedin}"
             st.markdown(f"- [{linkedin}]({linkedin})")
 
-def run_analysis():
-    """Run the startup analysis and store results in session state."""
-    try:
-        with st.spinner("Scraping data and analyzing with LLM..."):
-            results = main.main()
-            
-            # Check if the LLM response contains an error message
-            if results and isinstance(results, dict) and "llm_response" in results:
-                llm_response = results["llm_response"]
-                if llm_response.startswith("Error:"):
-                    st.error(llm_response)
-                    # Create a minimal results structure to avoid errors in the UI
-                    results = {
-                        "raw_content": "Error occurred during analysis",
-                        "url": "N/A",
-                        "llm_response": llm_response,
-                        "structured_data": {
-                            "number_of_startups": "N/A",
-                            "top_cities": [],
-                            "key_industries": [],
-                            "contact_info": {
-                                "emails": [],
-                                "websites": [],
-                                "linkedin": []
-                            },
-                            "insights": "An error occurred during the analysis."
-                        }
-                    }
-            
-            st.session_state.results = results
-            return results
-    except Exception as e:
-        error_msg = str(e)
-        st.error(f"An error occurred: {error_msg}")
-        
-        # Create a minimal results structure to avoid errors in the UI
-        results = {
-            "raw_content": f"Error: {error_msg}",
-            "url": "N/A",
-            "llm_response": f"Error: {error_msg}",
-            "structured_data": {
-                "number_of_startups": "N/A",
-                "top_cities": [],
-                "key_industries": [],
-                "contact_info": {
-                    "emails": [],
-                    "websites": [],
-                    "linkedin": []
-                },
-                "insights": "An error occurred during the analysis."
-            }
+def error_results(error_msg):
+    """Create a minimal results structure to avoid errors in the UI."""
+    return {
+        "raw_content": f"Error: {error_msg}",
+        "url": "N/A",
+        "llm_response": f"Error: {error_msg}",
+        "structured_data": {
+            "number_of_startups": "N/A",
+            "top_cities": [],
+            "key_industries": [],
+            "startups": [],
+            "contact_info": {
+                "emails": [],
+                "websites": [],
+                "linkedin": []
+            },
+            "insights": "An error occurred during the analysis."
         }
-        st.session_state.results = results
-        return results
+    }
+
+def display_structured_data(structured_data):
+    """Display the parsed LLM analysis sections that are available so far."""
+    if structured_data["number_of_startups"]:
+        st.subheader("Number of Startups")
+        st.markdown(f"**{structured_data['number_of_startups']}**")
+    
+    if structured_data["top_cities"]:
+        st.subheader("Top Startup Cities")
+        for city in structured_data["top_cities"]:
+            st.markdown(f"- {city}")
+    
+    if structured_data["key_industries"]:
+        st.subheader("Key Industries")
+        for industry in structured_data["key_industries"]:
+            st.markdown(f"- {industry}")
+    
+    # Analyses stored before startups were extracted have no "startups" key
+    if structured_data.get("startups"):
+        st.subheader("Startups Mentioned")
+        st.dataframe(
+            [{key: startup.get(key, "") for key in ("name", "city", "industry", "website")}
+             for startup in structured_data["startups"]],
+            hide_index=True
+        )
+    
+    if structured_data["insights"]:
+        st.subheader("Additional Insights")
+        st.markdown(structured_data["insights"])
+
+def display_startup_database(store):
+    """Show aggregates of the local startup database, built up by every analysis so far."""
+    total = store.count()
+    if not total:
+        return
+    
+    st.header("Startup Database")
+    st.metric("Startups on record", total)
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("By City")
+        by_city = store.counts_by("city", limit=10)
+        st.bar_chart({"startups": dict(by_city)})
+    with col2:
+        st.subheader("By Industry")
+        by_industry = store.counts_by("industry", limit=10)
+        st.bar_chart({"startups": dict(by_industry)})
+    
+    with st.expander("Browse startups"):
+        city = st.selectbox("City", ["All"] + [name for name, _ in by_city])
+        industry = st.selectbox("Industry", ["All"] + [name for name, _ in by_industry])
+        startups = store.find(city=None if city == "All" else city, industry=None if industry == "All" else industry)
+        for startup in startups:
+            startup["last_seen"] = time.strftime("%Y-%m-%d", time.localtime(startup.pop("last_seen")))
+            startup.pop("first_seen")
+        st.dataframe(startups, hide_index=True)
+
+@st.cache_resource
+def get_job_manager():
+    """Return the job manager shared by every session of this server process."""
+    return jobs.JobManager()
+
+@st.cache_resource
+def get_result_store():
+    """Return the store of completed analyses shared by every session of this server process."""
+    return ResultStore()
+
+def has_analysis(results):
+    """Return True if the LLM response was parsed into at least one field of the analysis."""
+    data = results["structured_data"]
+    return any(data.get(field) for field in ("number_of_startups", "top_cities", "key_industries", "startups", "insights"))
+
+def run_and_store_analysis(job, store, config_key):
+    """
+    Run the analysis job and save successful results as the newest version in the store.
+    Error messages and responses that parsed into nothing are not saved.
+    """
+    results = main.run_analysis_job(job)
+    if results["llm_response"].startswith("Error") or not has_analysis(results):
+        print("Not saving the analysis: the LLM response is an error or contains no analysis")
+    else:
+        version = store.put(config_key, results)
+        print(f"Saved analysis version {version}")
+    return results
+
+def start_analysis(store, config_key):
+    """
+    Submit the analysis as a background job and remember its id in the session.
+    Jobs are keyed by the analysis configuration, so if the same analysis is already
+    running (e.g. started from another tab), this session joins it.
+    """
+    st.session_state.job_id = get_job_manager().submit(config_key, run_and_store_analysis, store, config_key)
+    st.session_state.results = None
+
+def format_age(seconds):
+    """Format a duration in seconds as a short human-readable age."""
+    if seconds < 3600:
+        return f"{int(seconds // 60)} minutes"
+    if seconds < 2 * 86400:
+        return f"{seconds / 3600:.1f} hours"
+    return f"{seconds / 86400:.1f} days"
+
+def show_job_progress(job):
+    """Show the status of a running analysis and the sections parsed so far."""
+    st.info(job["message"])
+    if job["partial"]:
+        st.header("LLM Analysis")
+        display_structured_data(job["partial"])
+    if job["text"]:
+        with st.expander("Response so far", expanded=False):
+            st.markdown(job["text"])
+
+def finish_analysis(job):
+    """Store the results of a finished analysis job in session state."""
+    if job["error"]:
+        st.error(f"An error occurred: {job['error']}")
+        results = error_results(job["error"])
+    else:
+        results = job["result"]
+        
+        # Check if the LLM response contains an error message
+        llm_response = results["llm_response"]
+        if llm_response.startswith("Error:"):
+            st.error(llm_response)
+            results = error_results(llm_response[len("Error: "):])
+            results["raw_content"] = "Error occurred during analysis"
+    
+    st.session_state.results = results
+    st.session_state.job_id = None
 
 st.set_page_config(
     page_title="Czech Startup Analyzer",
@@ -91,12 +192,45 @@ st.markdown("This app analyzes the startup ecosystem in the Czech Republic using
 if "results" not in st.session_state:
     st.session_state.results = None
 
-# Add a button to run the analysis
-if st.button("Run Analysis") or st.session_state.results:
-    if st.session_state.results is None:
-        results = run_analysis()
+if "job_id" not in st.session_state:
+    st.session_state.job_id = None
+
+# Load the latest completed analysis for the current configuration, shared by all sessions
+config_key = main.get_analysis_config_key()
+result_store = get_result_store()
+latest = result_store.latest(config_key)
+if st.session_state.results is None and not st.session_state.job_id and latest:
+    st.session_state.results = latest["results"]
+
+# Add a button to run the analysis, or to refresh it once the stored one is stale
+if st.button("Refresh" if latest else "Run Analysis"):
+    if latest and result_store.is_fresh(latest):
+        st.info(f"The analysis is only {format_age(time.time() - latest['created_at'])} old, so it was not recomputed. "
+                f"It is refreshed once it is older than {format_age(result_store.ttl)}.")
     else:
-        results = st.session_state.results
+        start_analysis(result_store, config_key)
+
+# Poll the running analysis, rerunning the script until it has finished
+if st.session_state.job_id:
+    job = get_job_manager().get(st.session_state.job_id)
+    if job is None:
+        st.warning("The analysis job has expired. Please run the analysis again.")
+        st.session_state.job_id = None
+    else:
+        job = job.snapshot()
+        if job["status"] in (jobs.DONE, jobs.FAILED):
+            finish_analysis(job)
+        else:
+            show_job_progress(job)
+            time.sleep(POLL_INTERVAL)
+            st.rerun()
+
+if st.session_state.results:
+    results = st.session_state.results
+    
+    if latest and not results["llm_response"].startswith("Error:"):
+        st.caption(f"Analysis from {latest['analysis_date']} (version {latest['version']}, "
+                   f"{format_age(time.time() - latest['created_at'])} old)")
     
     # Create two columns for layout
     col1, col2 = st.columns([2, 1])
@@ -104,21 +238,7 @@ if st.button("Run Analysis") or st.session_state.results:
     with col1:
         st.header("LLM Analysis")
         structured_data = results["structured_data"]
-        
-        st.subheader("Number of Startups")
-        st.markdown(f"**{structured_data['number_of_startups']}**")
-        
-        st.subheader("Top Startup Cities")
-        for city in structured_data["top_cities"]:
-            st.markdown(f"- {city}")
-        
-        st.subheader("Key Industries")
-        for industry in structured_data["key_industries"]:
-            st.markdown(f"- {industry}")
-        
-        if structured_data["insights"]:
-            st.subheader("Additional Insights")
-            st.markdown(structured_data["insights"])
+        display_structured_data(structured_data)
     
     with col2:
         st.header("Contact Information")
@@ -129,7 +249,13 @@ if st.button("Run Analysis") or st.session_state.results:
         st.text_area("Raw Content", results["raw_content"], height=300)
     
     with st.expander("View Full LLM Response"):
-        st.markdown(results["llm_response"])
+        if results["llm_response"].lstrip().startswith("{"):
+            st.code(results["llm_response"], language="json")
+        else:
+            st.markdown(results["llm_response"])
+
+# Aggregates come from the local database, without the network or the LLM
+display_startup_database(main.startup_store)
 
 # Add information about the app
 with st.expander("About this app"):
@@ -139,6 +265,7 @@ with st.expander("About this app"):
     2. Uses LangChain and GPT-4 to analyze the scraped content
     3. Provides insights about the number of startups, top cities, and key industries
     4. Extracts contact information including emails, websites, and LinkedIn profiles
+    5. Keeps the individual startups it finds in a local database, summarized by city and industry
     
     Technologies used:
     - Python